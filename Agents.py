@@ -1,40 +1,49 @@
-import pandas as pd
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
-from langchain_core.prompts import PromptTemplate
-from dotenv import load_dotenv
-from langgraph.graph import START, END,StateGraph
-from typing import TypedDict,List,Dict,Optional,Any
 from llm_manager import LLM
-from datetime import datetime, date
-import re
+import asyncio
 import json
 
+## langchain is imported where a chain is built, so importing this module stays fast (see warmup)
 get_LLM = LLM()
 from State import State
-df = pd.read_csv("cleaned_master_for_chatbot.csv")
-
-llm = get_LLM.get_llm() ## simple llm
-structured_llm = get_LLM.get_structured_llm() ## structured llm 
-
-class Agent:
-    def __init__(self):
-        pass
-
-
-    def main_agent(self,state):
-        """
-    Takes a user query like:
-        "Show me 3BHK flats in Pune under ₹1.2 Cr"
-    Returns a dictionary:
-        {
-          "type": "3BHK",
-          "fullAddress": "Pune",
-          "price": 12000000
-        }
-    """
-
-        template = """
+from dataset import DatasetRegistry, parse_date_range, to_date
+from indexes import intersect_row_ids
+from planner import planned_row_ids
+from ranking import rank_page
+from query_cache import QueryCache, prompt_version
+from result_cache import FilterResultCache
+from fast_path import FastPathExtractor
+from serializer import serialize_rows
+from templated_answer import needs_llm, render_answer
+import config
+registry = DatasetRegistry() ## versioned listing snapshot + prebuilt column indexes, hot-swappable
+## row ids of filter sets already answered on the live dataset version; cleared on every swap
+result_cache = FilterResultCache(config.FILTER_CACHE_MAX_ENTRIES,config.FILTER_CACHE_MAX_BYTES)
+registry.on_swap(result_cache.on_swap)
+
+## query key -> df_dict slot holding the row ids its filter agent matched
+FILTER_SLOTS = {
+    "status":"row_ids_status",
+    "furnishedType":"row_ids_furnished",
+    "type":"row_ids_type",
+    "listingType":"row_ids_listing",
+    "carpetArea":"row_ids_area",
+    "price":"row_ids_price",
+    "possessionDate":"row_ids_possession",
+    "bathrooms":"row_ids_bathrooms",
+    "balcony":"row_ids_balcony",
+    "fullAddress":"row_ids_location",
+    "pincode":"row_ids_pincode",
+}
+
+fast_path = FastPathExtractor()
+## cheap to construct: its SQLite file is created and opened on first use or by Workflow.warmup()
+query_cache = QueryCache(
+    config.QUERY_CACHE_PATH,
+    ttl_seconds = config.QUERY_CACHE_TTL_SECONDS,
+    memory_size = config.QUERY_CACHE_MEMORY_SIZE,
+)
+
+MAIN_AGENT_TEMPLATE = """
         You are a strict JSON extractor for real-estate search queries.
 
         Task:
@@ -61,12 +70,12 @@ class Agent:
         - Convert prices to numeric **rupees** (integers or floats).  
             *Examples:* "1.2 Cr" -> 12000000, "80 lakh" -> 8000000.
         
-        - If user says **"above"/"over"**, set `"price"` to a **single numeric value** representing the lower bound.
-            *Example:* "above 50 lakh" -> `"price": 5000000`
+        - If user says **"above"/"over"**, set `"price"` to an object with the lower bound as `"min"` and `"max": null`.
+            *Example:* "above 50 lakh" -> `"price": {{"min": 5000000, "max": null}}`
         - If user gives a **range** (`"between X and Y"`), set `"price"` to an object with `{{"min": <rupees>, "max": <rupees>}}.
             *Example:* "between 50 and 80 lakh" -> `"price": {{"min": 5000000, "max": 8000000}}
-        - - If user says **"under"/"below"/"up to"**, set `"price"` to a **single numeric value** representing the upper bound.
-            *Example:* "under ₹1.2 Cr" -> `{{"min":0,"max":12000000}}
+        - If user says **"under"/"below"/"up to"**, set `"price"` to an object with `"min": 0` and the upper bound as `"max"`.
+            *Example:* "under ₹1.2 Cr" -> `"price": {{"min": 0, "max": 12000000}}`
             IMPORTANT: price output format rules (BE VERY STRICT)
         - If the user expresses an upper bound using words like "under", "below", "up to", or "maximum", the model MUST output the price as an object with "min" and "max". Use min = 0 and max = <rupees value>.
         Example: "under 1.2 Cr"  ->  "price": {{"min": 0, "max": 12000000}}
@@ -83,19 +92,17 @@ class Agent:
         3. possessionDate:
         - This represents the **expected date when the property will be ready for possession (handover date)**.
         - If the property is already ready to move in, use the status "READY_TO_MOVE" instead of setting a future possessionDate.
-        - If the user specifies a **future date, year, or range**, convert it into the ISO date format "YYYY-MM-DD".
-        - If the user only mentions a **year**, assume the start of that year ("YYYY-01-01").
-            Example: "possession in 2025" → "possessionDate": "2025-01-01"
-        - If the user mentions **by, before, or until a year**, treat it as **upper bound**.
-            Example: "possession by 2026" → "possessionDate": "2026-01-01"
-        - If the user says **after or from a year**, treat it as **lower bound**.
-            Example: "possession after 2024" → "possessionDate": "2024-01-01"
+        - Output possessionDate as an object with "min" and/or "max" ISO dates ("YYYY-MM-DD"), both inclusive.
+        - If the user mentions **by, before, or until** a date or year, set only `"max"`.
+            Example: "possession by 2026" → "possessionDate": {{"max": "2026-01-01"}}
+            For **before**, `"max"` is the day before that date: "possession before Dec 2025" → "possessionDate": {{"max": "2025-11-30"}}
+        - If the user says **after or from** a date or year, set only `"min"`.
+            Example: "possession after 2024" → "possessionDate": {{"min": "2024-01-01"}}
+        - If the user says possession **in** a year or month, set both ends of that period.
+            Example: "possession in 2025" → "possessionDate": {{"min": "2025-01-01", "max": "2025-12-31"}}
+            Example: "possession in Dec 2024" → "possessionDate": {{"min": "2024-12-01", "max": "2024-12-31"}}
         - If the user says **ready to move / already ready / immediate possession**, do **NOT** set possessionDate.
             Instead, set `"status": "READY_TO_MOVE"`.
-        - Always use a valid date string in ISO format. Examples:
-            "2025" → "2025-01-01"
-            "Dec 2024" → "2024-12-01"
-            "after 2023" → "2023-01-01"
         - If no clear possession information is given, **omit the key** (do not guess or hallucinate).
         - Do not output explanatory text — only the JSON key-value pair.
 
@@ -104,12 +111,12 @@ class Agent:
         Example 1:
         User: "Show me 2BHK flats ready in 2025"
         Output:
-        {{"type": "2BHK", "possessionDate": "2025-01-01"}}
+        {{"type": "2BHK", "possessionDate": {{"min": "2025-01-01", "max": "2025-12-31"}}}}
 
         Example 2:
         User: "Flats with possession by 2026 in Mumbai"
         Output:
-        {{"fullAddress": "Mumbai", "possessionDate": "2026-01-01"}}
+        {{"fullAddress": "Mumbai", "possessionDate": {{"max": "2026-01-01"}}}}
 
         Example 3:
         User: "3BHK ready to move apartments in Pune"
@@ -119,7 +126,7 @@ class Agent:
         Example 4:
         User: "Possession after 2024 near Baner"
         Output:
-        {{"possessionDate": "2024-01-01", "fullAddress": "Baner"}}
+        {{"possessionDate": {{"min": "2024-01-01"}}, "fullAddress": "Baner"}}
 
         Example 5:
         User: "Ready to move property"
@@ -129,7 +136,7 @@ class Agent:
         Example 6:
         User: "Expected possession in December 2025"
         Output:
-        {{"possessionDate": "2025-12-01"}}
+        {{"possessionDate": {{"min": "2025-12-01", "max": "2025-12-31"}}}}
 
         4. fullAddress:
         - Prefer the city / locality string that appears in the query (capitalized). e.g., "Pune", "Wakad, Pune", "Chembur, Mumbai".
@@ -140,6 +147,9 @@ class Agent:
 
         6. carpetArea:
         - Numeric area in square feet (integer or float). Accept inputs like "800 sqft" -> 800.
+        - A single number is read as the **minimum** area ("above 800 sqft" -> 800).
+        - For an upper bound or a range use an object: "under 1000 sqft" -> {{"min": null, "max": 1000}},
+            "between 800 and 1000 sqft" -> {{"min": 800, "max": 1000}}.
 
         7. bathrooms and balcony:
         - Integers.
@@ -190,7 +200,7 @@ class Agent:
         Example E:
         User: "Looking for a standalone complex, 4BHK, possession by 2026, fully furnished"
         Output:
-        {{"projectCategory":"STANDALONE","type":"4BHK","possessionDate":"2026-01-01","furnishedType":"FURNISHED"}}
+        {{"projectCategory":"STANDALONE","type":"4BHK","possessionDate":{{"max":"2026-01-01"}},"furnishedType":"FURNISHED"}}
 
 
 
@@ -207,7 +217,7 @@ class Agent:
         Example H:
         User: "Flats ready in 2024 in Chembur with at least 2 balconies"
         Output:
-        {{"possessionDate":"2024-01-01","fullAddress":"Chembur","balcony":2}}
+        {{"possessionDate":{{"min":"2024-01-01","max":"2024-12-31"}},"fullAddress":"Chembur","balcony":2}}
 
         Example I:
         User: "2 BHK resale in Noida with 2 bathrooms and pincode 201301"
@@ -221,255 +231,362 @@ class Agent:
             
 
                                                                                         """
-        user_query = state.get("user_query")
-        prompt = PromptTemplate(template = template,input_variables = ["user_query"])
+MAIN_AGENT_VERSION = prompt_version(MAIN_AGENT_TEMPLATE) ## cache namespace, changes whenever the prompt does
 
-        chain = prompt | structured_llm 
-        response = chain.invoke({"user_query":user_query})
-        return {"output_dict":response}
+FINAL_AGENT_TEMPLATE = """ You are an intelligent system.You will be given final dataset as CSV text (the first line is the header,
+        prices are in rupees and carpetArea in sqft)
+        {final_rows}
+        along with output dictionary provided in a dictionary  {output_dict}.
+        and this is the orignal user query {user_query}.
+        based on this following data give a final response.This final response will be holding the answer of the query
+        based on the data of final dataset and output dictionary.The response should be in simple langauge covering
+        all the information about the user query what every you think the user is expecting for.Before generating the query think two three times
+        while taking the reference of provided data.
+
+        ImportantNote:  While generating the response keep it like human to human conversation without missing any important details
+        ,it should be like you are giving all details to the user but user should not feel that he/she is communicating with the machine
+        
+
+                        """
+
+## the chat / structured models; None until first use builds them (benchmarks assign offline stand-ins)
+llm = None ## simple llm
+structured_llm = None ## structured llm
+
+class Agent:
+    def __init__(self):
+        pass
+
+
+    def main_agent(self,state):
+        """
+    Takes a user query like:
+        "Show me 3BHK flats in Pune under ₹1.2 Cr"
+    Returns a dictionary:
+        {
+          "type": "3BHK",
+          "fullAddress": "Pune",
+          "price": 12000000
+        }
+    """
+
+        user_query = state.get("user_query")
+        output_dict = self.extract_cached(user_query,state.get("dataset_version"))
+        if output_dict is None:
+            output_dict = self.main_chain().invoke({"user_query":user_query})
+            query_cache.put(user_query,MAIN_AGENT_VERSION,output_dict)
+        return self.with_cached_filters(state,output_dict)
+
+    async def amain_agent(self,state):
+        """Async twin of main_agent, used when the graph runs through ainvoke."""
+        user_query = state.get("user_query")
+        ## the extraction cache reads and commits to SQLite; keep that off the event loop
+        output_dict = await asyncio.to_thread(self.extract_cached,user_query,state.get("dataset_version"))
+        if output_dict is None:
+            output_dict = await (await self.amain_chain()).ainvoke({"user_query":user_query})
+            await asyncio.to_thread(query_cache.put,user_query,MAIN_AGENT_VERSION,output_dict)
+        return self.with_cached_filters(state,output_dict)
+
+    def with_cached_filters(self,state,output_dict):
+        ## main_agent's update: the extraction, the dataset pin and, for a filter set already
+        ## answered on that version, its row ids (the workflow then skips the filter stage)
+        update = {"output_dict":output_dict,**self.dataset_pin(state)}
+        version = update.get("dataset_version",state.get("dataset_version"))
+        row_ids = result_cache.get(output_dict,version)
+        if row_ids is not None:
+            update["df_dict"] = {"row_ids_cached":row_ids}
+        return update
+
+    def extract_batch(self,user_queries,max_concurrency,version = None):
+        """
+        output_dict for each query: fast path / cache first, then a single batched
+        LLM call for everything left. A failed extraction comes back as its exception.
+        """
+        output_dicts = [self.extract_cached(q,version) for q in user_queries]
+        missing = [i for i,output_dict in enumerate(output_dicts) if output_dict is None]
+        if missing:
+            extracted = self.main_chain().batch([{"user_query":user_queries[i]} for i in missing],
+                                                config = {"max_concurrency":max_concurrency},return_exceptions = True)
+            for i,output_dict in zip(missing,extracted):
+                output_dicts[i] = output_dict
+            self.store_extractions([user_queries[i] for i in missing],extracted)
+        return output_dicts
+
+    async def aextract_batch(self,user_queries,max_concurrency,version = None):
+        """Async twin of extract_batch."""
+        output_dicts = await asyncio.to_thread(lambda: [self.extract_cached(q,version) for q in user_queries])
+        missing = [i for i,output_dict in enumerate(output_dicts) if output_dict is None]
+        if missing:
+            extracted = await (await self.amain_chain()).abatch([{"user_query":user_queries[i]} for i in missing],
+                                                       config = {"max_concurrency":max_concurrency},return_exceptions = True)
+            for i,output_dict in zip(missing,extracted):
+                output_dicts[i] = output_dict
+            await asyncio.to_thread(self.store_extractions,[user_queries[i] for i in missing],extracted)
+        return output_dicts
+
+    def store_extractions(self,user_queries,output_dicts):
+        for user_query,output_dict in zip(user_queries,output_dicts):
+            if not isinstance(output_dict,Exception):
+                query_cache.put(user_query,MAIN_AGENT_VERSION,output_dict)
+
+    def dataset_pin(self,state):
+        ## requests started through Workflow arrive pinned; anything else runs on the live version
+        if state.get("dataset_version") is not None:
+            return {}
+        return {"dataset_version":registry.current().version}
+
+    def get_dataset(self,state):
+        return registry.get(state.get("dataset_version"))
+
+    def extract_cached(self,user_query,version = None):
+        """Fast path first, then the extraction cache; None means the LLM has to be asked."""
+        ## common vocabulary needs no LLM at all; place names must be ones the dataset knows
+        vocabulary = registry.get(version).location.tokens
+        extracted, confidence = fast_path.extract(user_query,vocabulary)
+        if extracted and confidence >= config.FAST_PATH_MIN_CONFIDENCE:
+            return extracted
+        return query_cache.get(user_query,MAIN_AGENT_VERSION) ## repeated / near-identical queries skip the LLM
+
+    def main_chain(self):
+        from langchain_core.prompts import PromptTemplate
+        prompt = PromptTemplate(template = MAIN_AGENT_TEMPLATE,input_variables = ["user_query"])
+        return prompt | (structured_llm or get_LLM.get_structured_llm())
+
+    async def amain_chain(self):
+        ## building the clients imports langchain_openai; keep that off the event loop
+        if structured_llm is None:
+            await get_LLM.abuild()
+        return self.main_chain()
     
     def status_agent(self,state:State):
          ## first of all i will fetching the output_dict from the state
         output_dict = state.get("output_dict")
-        df_dict = state.get("df_dict")
         if "status" in list(output_dict.keys()):
-            status = output_dict.get("status")
-            filtered_df = df[df["status"].astype(str).str.upper() == status.strip().upper()].copy()
-            df_dict["filtered_df_status"] = filtered_df 
+            row_ids = self.get_dataset(state).categorical.lookup("status",output_dict.get("status"))
         else:
-            df_dict["filtered_df_status"] = None
-        
-        return {"df_dict":df_dict}
+            row_ids = None
+        return {"df_dict":{"row_ids_status":row_ids}}
     
     def furnished_agent(self,state:State):
         output_dict = state.get("output_dict")
-        df_dict = state.get("df_dict")
         if "furnishedType" in list(output_dict.keys()):
-            furnishedType = output_dict.get("furnishedType")
-            filtered_df = df[df["furnishedType"].astype(str).str.upper() == furnishedType.strip().upper()].copy()
-            df_dict["filtered_df_furnished"] = filtered_df 
+            row_ids = self.get_dataset(state).categorical.lookup("furnishedType",output_dict.get("furnishedType"))
         else:
-            df_dict["filtered_df_status"] = None
-        return {"df_dict":df_dict} 
+            row_ids = None
+        return {"df_dict":{"row_ids_furnished":row_ids}}
     
     def type_agent(self,state:State):
         output_dict = state.get("output_dict")
-        df_dict = state.get("df_dict")
         if "type" in list(output_dict.keys()):
-            type = output_dict.get("type")
-            filtered_df = df[df["type"].astype(str).str.upper() == type.strip().upper()].copy()
-            df_dict["filtered_df_type"] = filtered_df 
+            row_ids = self.get_dataset(state).categorical.lookup("type",output_dict.get("type"))
         else:
-            df_dict["filtered_df_type"] = None
-        return {"df_dict":df_dict}
+            row_ids = None
+        return {"df_dict":{"row_ids_type":row_ids}}
     
     def listingType_agent(self,state:State):
         output_dict = state.get("output_dict")
-        df_dict = state.get("df_dict")
         if "listingType" in list(output_dict.keys()):
-            listing = output_dict.get("listingType")
-            filtered_df = df[df["listingType"] == listing].copy()
-            df_dict["filtered_df_listing"] = filtered_df
+            row_ids = self.get_dataset(state).categorical.lookup("listingType",output_dict.get("listingType"))
         else:
-            df_dict["filtered_df_listing"] = None
-        return {"df_dict":df_dict}
+            row_ids = None
+        return {"df_dict":{"row_ids_listing":row_ids}}
     
     def carpet_area_agent(self,state:State):
         output_dict = state.get("output_dict")
-        df_dict = state.get("df_dict")
         if "carpetArea" in list(output_dict.keys()):
-            area = output_dict.get("carpetArea")
-            filtered_df = df[df["carpetArea"] == area].copy()
-            df_dict["filtered_df_area"] = filtered_df
+            row_ids = self.get_dataset(state).range_rows("carpetArea",output_dict.get("carpetArea"))
         else:
-            df_dict["filtered_df_area"] = None
-        return {"df_dict":df_dict}
+            row_ids = None
+        return {"df_dict":{"row_ids_area":row_ids}}
     
     def price_agent(self,state:State):
         output_dict = state.get("output_dict")
-        df_dict = state.get("df_dict")
-
         if "price" in list(output_dict.keys()):
-            price = output_dict.get("price")
-            if isinstance(price,dict):
-                min_price = price.get("min") ## minimum price
-                max_price = price.get("max") ## maximum price
-                filtered_df = df[(df['price'] > min_price) & (df['price'] < max_price)].copy()
-            elif isinstance(price,int):
-                filtered_df = df[df["price"] == price].copy()
-            else:
-                filtered_df = None
-            df_dict["filtered_df_price"] = filtered_df
+            row_ids = self.get_dataset(state).range_rows("price",output_dict.get("price"))
         else:
-            df_dict["filtered_df_price"] = None
-        return {"df_dict":df_dict}
+            row_ids = None
+        return {"df_dict":{"row_ids_price":row_ids}}
     
     def convert_to_date(self,date_input):
-        """
-        Converts any date-like input (string, int year, datetime, etc.)
-        into a Python `date` object (YYYY-MM-DD) with no time part.
-        
-        Works great for comparisons and filtering in pandas.
-
-        Examples:
-            'Dec 2025'     -> date(2025, 12, 1)
-            '2025-12-25'   -> date(2025, 12, 25)
-            '2025'         -> date(2025, 1, 1)
-            datetime(2024,3,5,9,0) -> date(2024, 3, 5)
-            None or invalid -> None
-        """
-        if date_input is None or (isinstance(date_input, str) and not date_input.strip()):
-            return None
+        ## kept for callers of the agent API; the parsing lives next to the indexes in dataset.py
+        return to_date(date_input)
 
-        # Already a datetime or date
-        if isinstance(date_input, datetime):
-            return date_input.date()
-        if isinstance(date_input, date):
-            return date_input  # already date object
-
-        # If it's a year (int or string)
-        try:
-            year = int(date_input)
-            if 1900 <= year <= 2100:
-                return date(year, 1, 1)
-        except Exception:
-            pass
-
-        # ✅ Correct parsing for ISO formats (YYYY-MM-DD)
-        try:
-            dt = pd.to_datetime(str(date_input), errors="coerce")
-            if pd.notna(dt):
-                return dt.date()  # convert to date (no time)
-        except Exception:
-            pass
-
-        # Fallback: find a 4-digit year in text
-        match = re.search(r"(20\d{2})", str(date_input))
-        if match:
-            return date(int(match.group(1)), 1, 1)
-
-        return None
-        
+    def possession_bounds(self,value):
+        return parse_date_range(value)
 
     def possession_date_agent(self,state:State):
         output_dict = state.get("output_dict")
-        df_dict = state.get("df_dict")
+        bounds = None
         if "possessionDate" in list(output_dict.keys()):
-            date = output_dict.get("possessionDate")
-            date_object = self.convert_to_date(date)
-            df_test = df.copy()
-            df_test["possessionDate"] = df_test["possessionDate"].map(lambda x: str(x).split(" ")[0] if pd.notna(x) else None)
-
-            df_test["possessionDate"] = df_test["possessionDate"].map(self.convert_to_date)
-            #  filter rows where possessionDate is not null and < target_date
-            filtered_df = df_test[df_test["possessionDate"].notna() & (df_test["possessionDate"] < date_object)].copy()
-            df_dict["filtered_df_possession"] = filtered_df
+            bounds = self.possession_bounds(output_dict.get("possessionDate"))
+        if bounds is not None:
+            row_ids = self.get_dataset(state).dates.range("possessionDate",*bounds)
         else:
-            df_dict["filtered_df_possession"] = None
-        return {"df_dict":df_dict}
+            row_ids = None
+        return {"df_dict":{"row_ids_possession":row_ids}}
     
     def bathroom_agent(self,state:State):
         output_dict = state.get("output_dict")
-        df_dict = state.get("df_dict")
         if "bathrooms" in list(output_dict.keys()):
-            bathrooms = output_dict.get("bathrooms")
-            filtered_df = df[df["bathrooms"] == bathrooms].copy()
-            df_dict["filtered_df_bathrooms"] = filtered_df
+            row_ids = self.get_dataset(state).range_rows("bathrooms",output_dict.get("bathrooms"))
         else:
-            df_dict["filtered_df_bathrooms"] = None
-        return {"df_dict":df_dict}
+            row_ids = None
+        return {"df_dict":{"row_ids_bathrooms":row_ids}}
     
     def balcony_agent(self,state:State):
         output_dict = state.get("output_dict")
-        df_dict = state.get("df_dict")
         if "balcony" in list(output_dict.keys()):
-            balcony = output_dict.get("balcony")
-            filtered_df = df[df["balcony"] == balcony].copy()
-            df_dict["filtered_df_balcony"] = filtered_df
+            row_ids = self.get_dataset(state).range_rows("balcony",output_dict.get("balcony"))
         else:
-            df_dict["filtered_df_balcony"] = None
-        return {"df_dict":df_dict}
-    
-    def retrieve_agent(self,state: State):
-        output_dict = state.get("output_dict", {})
-        df_dict = state.get("df_dict", {})
+            row_ids = None
+        return {"df_dict":{"row_ids_balcony":row_ids}}
 
-        list_agents = list(output_dict.keys())
-        list_df = []
-
-        # --- collect all filtered dataframes that exist ---
-        if "status" in list_agents and df_dict.get("filtered_df_status") is not None:
-            list_df.append(df_dict["filtered_df_status"])
-
-        if "furnishedType" in list_agents and df_dict.get("filtered_df_furnished") is not None:
-            list_df.append(df_dict["filtered_df_furnished"])
-
-        if "type" in list_agents and df_dict.get("filtered_df_type") is not None:
-            list_df.append(df_dict["filtered_df_type"])
+    def location_agent(self,state:State):
+        ## address tokens (typo tolerant) and pincode prefix, both answered by the location index
+        output_dict = state.get("output_dict")
+        location = self.get_dataset(state).location
+        address_ids = location.lookup(output_dict.get("fullAddress")) if "fullAddress" in output_dict else None
+        pincode_ids = location.pincode(output_dict.get("pincode")) if "pincode" in output_dict else None
+        return {"df_dict":{"row_ids_location":address_ids,"row_ids_pincode":pincode_ids}}
+    
+    def planner_agent(self,state:State):
+        ## whole filter stage in one node: only the query's own predicates, most selective first
+        output_dict = state.get("output_dict")
+        row_ids = planned_row_ids(self.get_dataset(state),output_dict)
+        return {"df_dict":{"row_ids_filtered":row_ids}}
 
-        if "listingType" in list_agents and df_dict.get("filtered_df_listing") is not None:
-            list_df.append(df_dict["filtered_df_listing"])
+    def sharded_filter_agent(self,state:State):
+        ## whole filter stage in one node: city shards filtered in parallel on the process pool
+        output_dict = state.get("output_dict")
+        row_ids = self.get_dataset(state).sharded_filter().filter(output_dict)
+        return {"df_dict":{"row_ids_filtered":row_ids}}
 
-        if "carpetArea" in list_agents and df_dict.get("filtered_df_area") is not None:
-            list_df.append(df_dict["filtered_df_area"])
+    def sql_filter_agent(self,state:State):
+        ## whole filter stage as one SQL predicate over the embedded filter store
+        output_dict = state.get("output_dict")
+        row_ids = self.get_dataset(state).sql_filter().filter(output_dict)
+        return {"df_dict":{"row_ids_filtered":row_ids}}
 
-        if "price" in list_agents and df_dict.get("filtered_df_price") is not None:
-            list_df.append(df_dict["filtered_df_price"])
+    def retrieve_agent(self,state: State):
+        output_dict = state.get("output_dict", {})
+        df_dict = state.get("df_dict", {})
 
-        if "possessionDate" in list_agents and df_dict.get("filtered_df_possession") is not None:
-            list_df.append(df_dict["filtered_df_possession"])
+        dataset = self.get_dataset(state)
 
-        if "bathrooms" in list_agents and df_dict.get("filtered_df_bathrooms") is not None:
-            list_df.append(df_dict["filtered_df_bathrooms"])
+        # --- a repeated filter set was answered from the result cache by main_agent ---
+        if df_dict.get("row_ids_cached") is not None:
+            return self.ranked(state,dataset,df_dict["row_ids_cached"])
 
-        if "balcony" in list_agents and df_dict.get("filtered_df_balcony") is not None:
-            list_df.append(df_dict["filtered_df_balcony"])
+        # --- collect the row ids of every filter that ran ---
+        list_row_ids = [
+            df_dict[slot]
+            for key, slot in FILTER_SLOTS.items()
+            if key in output_dict and df_dict.get(slot) is not None
+        ]
+        if df_dict.get("row_ids_filtered") is not None:
+            list_row_ids.append(df_dict["row_ids_filtered"])  # already ANDed by a whole-stage backend
 
-        # --- Step 2: find intersection of all filtered DataFrames ---
-        if not list_df:
+        # --- Step 2: AND the row-id sets (smallest first) ---
+        if not list_row_ids:
             # if no filters were applied
-            final_df = None
-        else:
-            # start with the first dataframe
-            final_df = list_df[0]
-            # iteratively keep only common rows
-            for df_part in list_df[1:]:
-                final_df = pd.merge(final_df, df_part, how="inner")
-
-        # --- Step 3: store the final filtered dataframe ---
-        df_dict["final_filtered_df"] = final_df
-        state["df_dict"] = df_dict
-
-        return {"df_dict":df_dict}
+            return {"df_dict":{"final_filtered_df":None}}
+        row_ids = intersect_row_ids(list_row_ids)
+        result_cache.put(output_dict,dataset.version,row_ids)
+
+        # --- Step 3: rank the matches and materialize only the requested page ---
+        return self.ranked(state,dataset,row_ids)
+
+    def ranked(self,state,dataset,row_ids):
+        ## closest matches first, RESULT_PAGE_SIZE at a time; state["cursor"] asks for the page after a previous one
+        page_ids,start,next_cursor = rank_page(dataset,state.get("output_dict") or {},row_ids,
+                                               config.RESULT_PAGE_SIZE,state.get("cursor"))
+        page = {"total":len(row_ids),"start":start,"next_cursor":next_cursor}
+        return {"df_dict":{"final_filtered_df":dataset.rows(page_ids)},"page":page}
     
-    def final_agent(self,state:State):
+    def final_inputs(self,state:State):
         df_dict = state.get("df_dict")
         output_dict = state.get("output_dict")
         final_df = df_dict.get("final_filtered_df")
-        final_df_list = final_df.to_dict(orient='records')
+        ## compact, token-budgeted rows instead of every column of every match
+        final_rows = serialize_rows(
+            final_df,
+            token_budget = config.FINAL_PROMPT_TOKEN_BUDGET,
+            top_k = config.FINAL_PROMPT_TOP_K,
+        )
+
+        page = state.get("page")
+        if page and final_df is not None and page["total"] > page["start"] + len(final_df):
+            remaining = page["total"] - page["start"] - len(final_df)
+            final_rows += f"\n... {remaining} more matching rows ranked below these (the user can ask to see more)"
 
         user_query = state.get("user_query")
-        template = """ You are an intelligent system.You will be given final dataset in list format {final_df_list}
-        along with output dictionary provided in a dictionary  {output_dict}.These are the columns of the dataset 
-        ['projectName', 'status', 'possessionDate', 'fullAddress', 'pincode',
-        'type', 'carpetArea', 'price', 'bathrooms', 'balcony', 'listingType',
-        'furnishedType', 'projectCategory', 'projectType', 'propertyCategory',
-        'landmark', 'cityId', 'localityId', 'subLocalityId', 'propertyImages',
-        'floorPlanImage'].
-        and this is the orignal user query {user_query}.
-        based on this following data give a final response.This final response will be holding the answer of the query
-        based on the data of final dataset and output dictionary.The response should be in simple langauge covering
-        all the information about the user query what every you think the user is expecting for.Before generating the query think two three times
-        while taking the reference of provided data.
+        return {"final_rows":final_rows,"output_dict":json.dumps(output_dict),"user_query":user_query}
 
-        ImportantNote:  While generating the response keep it like human to human conversation without missing any important details
-        ,it should be like you are giving all details to the user but user should not feel that he/she is communicating with the machine
-        
+    def final_chain(self):
+        from langchain_core.prompts import PromptTemplate
+        prompt = PromptTemplate(template = FINAL_AGENT_TEMPLATE,input_variables = ["final_rows","output_dict","user_query"])
+        return prompt | (llm or get_LLM.get_llm())
 
-                        """
-        
+    async def afinal_chain(self):
+        if llm is None:
+            await get_LLM.abuild()
+        return self.final_chain()
+
+    def templated_response(self,state:State):
+        """Answer rendered locally when the escalation policy says the LLM adds nothing; else None."""
+        final_df = state.get("df_dict").get("final_filtered_df")
+        output_dict = state.get("output_dict")
+        if needs_llm(state.get("user_query"),output_dict,final_df,
+                     mode = config.ANSWER_MODE,max_rows = config.ANSWER_TEMPLATE_MAX_ROWS):
+            return None
+        from langchain_core.messages import AIMessage
+        return AIMessage(content = render_answer(output_dict,final_df,state.get("page")))
+
+    def final_agent(self,state:State):
+        response = self.templated_response(state)
+        if response is None:
+            response = self.final_chain().invoke(self.final_inputs(state))
+        return {"response":response}
 
-        prompt = PromptTemplate(template = template,input_variables = ["final_df_dict","output_dict","user_query"])
-        chain = prompt | llm 
-        response = chain.invoke({"final_df_list":final_df_list,"output_dict":json.dumps(output_dict),"user_query":user_query})
+    def filter_batch(self,output_dicts,version):
+        """Row ids for many extracted queries: result cache first, one shared pass for the rest."""
+        row_ids = [result_cache.get(output_dict,version) for output_dict in output_dicts]
+        missing = [i for i,ids in enumerate(row_ids) if ids is None]
+        computed = registry.get(version).filter_row_ids_batch([output_dicts[i] for i in missing])
+        for i,ids in zip(missing,computed):
+            row_ids[i] = ids
+            if ids is not None:
+                result_cache.put(output_dicts[i],version,ids)
+        return row_ids
+
+    def final_batch(self,states,max_concurrency):
+        """final_agent for many states: templated answers locally, the rest in one batched LLM call."""
+        responses = [self.templated_response(state) for state in states]
+        pending = [i for i,response in enumerate(responses) if response is None]
+        if pending:
+            generated = self.final_chain().batch([self.final_inputs(states[i]) for i in pending],
+                                                 config = {"max_concurrency":max_concurrency},return_exceptions = True)
+            for i,response in zip(pending,generated):
+                responses[i] = response
+        return responses
+
+    async def afinal_batch(self,states,max_concurrency):
+        """Async twin of final_batch."""
+        responses = [self.templated_response(state) for state in states]
+        pending = [i for i,response in enumerate(responses) if response is None]
+        if pending:
+            inputs = await asyncio.to_thread(lambda: [self.final_inputs(states[i]) for i in pending])
+            generated = await (await self.afinal_chain()).abatch(inputs,
+                                                        config = {"max_concurrency":max_concurrency},return_exceptions = True)
+            for i,response in zip(pending,generated):
+                responses[i] = response
+        return responses
+
+    async def afinal_agent(self,state:State):
+        """Async twin of final_agent, used when the graph runs through ainvoke."""
+        response = self.templated_response(state)
+        if response is None:
+            ## token counting may load (or, without a local cache, download) the tiktoken encoding
+            inputs = await asyncio.to_thread(self.final_inputs,state)
+            response = await (await self.afinal_chain()).ainvoke(inputs)
         return {"response":response}
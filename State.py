@@ -11,4 +11,8 @@ class State(TypedDict):
     user_query:str
     output_dict:Dict
     df_dict:Annotated[dict, merge_dicts]
-    response:str
\ No newline at end of file
+    response:str
+    dataset_version:Optional[int] ## DatasetRegistry version this request runs on
+    trace_id:Optional[str] ## correlates the per-node trace records of one request
+    cursor:Optional[str] ## "show more": the next_cursor of the previous page of the same query
+    page:Optional[dict] ## {"total": matches, "start": rows shown before this page, "next_cursor": str or None}
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import secrets
+import threading
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+import config
+from workflow import Workflow
+from Agents import query_cache, registry, result_cache
+from llm_manager import LLM
+from tracing import configure_logging, render_metrics
+
+work = Workflow()
+## bounds how many graph executions run at once; the rest wait here instead of piling onto the LLM
+limiter = asyncio.Semaphore(config.API_MAX_CONCURRENCY)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.TRACE_ENABLED:
+        configure_logging(config.TRACE_LOG_FILE or None)
+    if config.WARMUP_MODE == "eager":
+        work.warmup()
+    elif config.WARMUP_MODE == "background":
+        ## requests arriving meanwhile wait on the same load locks instead of repeating the work
+        threading.Thread(target = work.warmup,name = "warmup",daemon = True).start()
+    yield
+    await LLM().aclose()
+
+
+app = FastAPI(title = "Real Estate Agentic AI", lifespan = lifespan)
+
+
+class QueryRequest(BaseModel):
+    query: str
+    cursor: Optional[str] = None ## next_cursor of a previous response to the same query: "show more"
+
+
+class QueryResponse(BaseModel):
+    response: str
+    total: Optional[int] = None ## matching listings in all; the answer covers one ranked page of them
+    next_cursor: Optional[str] = None
+
+
+@app.post("/query", response_model = QueryResponse)
+async def query(request: QueryRequest):
+    inputs = {"user_query":request.query,"df_dict":{},"cursor":request.cursor}
+    async with limiter:
+        result = await work.aexecute_page(inputs)
+    return QueryResponse(**result)
+
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    """Server-sent events: one `data: {"token": ...}` event per answer chunk, then `event: done`."""
+    inputs = {"user_query":request.query,"df_dict":{},"cursor":request.cursor}
+
+    async def events():
+        async with limiter:
+            async for token in work.astream(inputs):
+                yield f"data: {json.dumps({'token': token})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(events(), media_type = "text/event-stream")
+
+
+@app.post("/admin/reload")
+async def reload_dataset(x_admin_token: Optional[str] = Header(None)):
+    """
+    Rebuild the snapshot and indexes in the background and hot-swap them in.
+    Only with the ADMIN_TOKEN in X-Admin-Token (404 when no token is configured);
+    a call while a build is already running joins it instead of starting another.
+    """
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code = 404)
+    if not secrets.compare_digest((x_admin_token or "").encode(),config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code = 403,detail = "invalid admin token")
+    started = registry.reload_in_background() is not None
+    return {"reloading":True,"started":started,"dataset_version":registry.latest or None}
+
+
+@app.get("/health")
+async def health():
+    ## never loads anything: while the first dataset version is still being built it reports "warming"
+    version = registry.latest or None
+    return {"status":"ok" if version else "warming","dataset_version":version,
+            "extraction_cache":query_cache.stats(),"filter_cache":result_cache.stats()}
+
+@app.get("/metrics", response_class = PlainTextResponse)
+async def metrics():
+    ## Prometheus scrape target: per-node latency / rows / bytes histograms and LLM token counters
+    return PlainTextResponse(render_metrics(),media_type = "text/plain; version=0.0.4")
+
+
+## run with: uvicorn api:app --host 0.0.0.0 --port 8000
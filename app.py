@@ -4,6 +4,20 @@ from datetime import date, time
 import os
 from dotenv import load_dotenv
 load_dotenv()
+import config
+from tracing import configure_logging
+from workflow import Workflow
+
+
+@st.cache_resource
+def get_workflow():
+    ## built once per server process and reused by every session / click
+    if config.TRACE_ENABLED:
+        configure_logging(config.TRACE_LOG_FILE or None)
+    return Workflow().warmup()
+
+
+work = get_workflow()
 
 st.title("Get your property data here🌌")
 
@@ -16,10 +30,5 @@ question = st.text_input("enter your query")
 if st.button("Get Prediction"):
         inputs = {"user_query":question,"df_dict":{}}
 
-        # Spinner while workflow executes
-        with st.spinner("Getting response for you"):
-            from workflow import Workflow
-            work = Workflow()
-            response = work.execute(inputs)
-
-        st.success(response)
\ No newline at end of file
+        # Render the answer token by token as final_agent generates it
+        st.write_stream(work.stream(inputs))
@@ -0,0 +1,91 @@
+"""
+Equivalence check and speed comparison of data_modification.clean_price
+(per-row) against clean_price_series (vectorized).
+
+    python -m benchmarks.clean_price --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_modification import clean_price, clean_price_series
+
+## every documented clean_price case, plus the messy spellings seen in variant exports
+PRICE_SAMPLES = [
+    "1.2 Cr", "1.25 crore", "3 crores", "80 lakh", "45 Lac", "50 lacs", "50-60 lakh", "1 to 1.5 cr",
+    "₹1,50,00,000", "₹ 85,00,000", "INR 7500000", "approx 45 lakh", "around 1.1 cr", "~ 90 lakh",
+    "estimated 2 cr", "est. 65 lakh", "8500 per sqft", "9,200/sqft", "7800 psf", "120000000", " 15000000 ",
+    "price on request", "", "  ", "NA", "1.2cr onwards", "10 - 12", 12000000, 8500000.0, 0, None, np.nan,
+]
+
+
+def sample_prices(rows: int, seed: int = 7) -> pd.Series:
+    """
+    Export-like price column: mostly plain rupee amounts, then lakh/cr
+    spellings, ₹-formatted amounts and the odd messy value, with realistic
+    (high) cardinality rather than a handful of repeated strings.
+    """
+    rng = np.random.default_rng(seed)
+    rupees = rng.integers(15, 500, size=rows) * 100_000 + rng.integers(0, 100, size=rows) * 1_000
+    lakhs = np.round(rupees / 1e5, 1)
+    kind = rng.choice(6, size=rows, p=[0.6, 0.12, 0.1, 0.08, 0.05, 0.05])
+    out = []
+    for k, amount, lakh in zip(kind, rupees, lakhs):
+        if k == 0:
+            out.append(str(amount))
+        elif k == 1:
+            out.append(f"{lakh:g} lakh")
+        elif k == 2:
+            out.append(f"{lakh / 100:.2f} Cr")
+        elif k == 3:
+            out.append(f"₹{amount:,}")
+        elif k == 4:
+            out.append(f"{lakh:g}-{lakh + 5:g} lakh")
+        else:
+            out.append(PRICE_SAMPLES[amount % len(PRICE_SAMPLES)])
+    return pd.Series(out, dtype=object)
+
+
+def check_equivalence(values: pd.Series) -> int:
+    """Raises AssertionError on the first mismatch; returns the number of rows compared."""
+    expected = values.apply(clean_price).astype(float)
+    actual = clean_price_series(values)
+    same = np.isclose(expected, actual, rtol=0, atol=0, equal_nan=True)
+    if not same.all():
+        bad = np.flatnonzero(~same)[:10]
+        details = [(values.iloc[i], expected.iloc[i], actual.iloc[i]) for i in bad]
+        raise AssertionError(f"clean_price_series differs from clean_price: {details}")
+    return len(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--variants", default="data/ProjectConfigurationVariant.csv",
+                        help="real export whose price column is also checked for equivalence")
+    args = parser.parse_args()
+
+    check_equivalence(pd.Series(PRICE_SAMPLES, dtype=object))
+    check_equivalence(pd.read_csv(args.variants)["price"])
+    values = sample_prices(args.rows)
+    check_equivalence(values.head(100_000))
+    print("equivalence: ok")
+
+    start = time.perf_counter()
+    values.apply(clean_price)
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clean_price_series(values)
+    vectorized = time.perf_counter() - start
+
+    print(f"rows:        {len(values):,}")
+    print(f"clean_price (apply):  {scalar:.3f}s")
+    print(f"clean_price_series:   {vectorized:.3f}s")
+    print(f"speedup:              {scalar / vectorized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Deterministic stand-ins for the llm_manager.LLM chat and structured models,
+so the whole graph runs offline with a configurable per-call latency.
+
+    from benchmarks import fake_llm
+    fake_llm.install(latency=0.4)   # before building the Workflow
+
+The structured model answers with what FastPathExtractor finds in the user
+query; the chat model answers with a fixed sentence and reports token usage
+(~4 characters per token) so tracing records LLM tokens as it would in production.
+"""
+import asyncio
+import os
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from fast_path import FastPathExtractor
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that sleeps `latency` seconds and answers deterministically."""
+
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def answer(self, messages) -> ChatResult:
+        prompt = "".join(str(m.content) for m in messages)
+        content = f"Here are the listings that match your request ({estimate_tokens(prompt)} prompt tokens of context)."
+        usage = {"input_tokens": estimate_tokens(prompt), "output_tokens": estimate_tokens(content)}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content, usage_metadata=usage))])
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self.answer(messages)
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.answer(messages)
+
+
+def fake_structured_llm(latency: float = 0.0):
+    """Runnable in place of `llm.with_structured_output(PropertyQuery)`: the fast-path rules, after `latency` seconds."""
+    extractor = FastPathExtractor()
+
+    def extract(prompt_value) -> dict:
+        text = prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value)
+        user_query = text.rsplit("User:", 1)[-1].strip()  # MAIN_AGENT_TEMPLATE ends with "User: {user_query}"
+        return extractor.extract(user_query)[0]
+
+    def invoke(prompt_value):
+        if latency:
+            time.sleep(latency)
+        return extract(prompt_value)
+
+    async def ainvoke(prompt_value):
+        if latency:
+            await asyncio.sleep(latency)
+        return extract(prompt_value)
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+
+def install(latency: float = 0.0):
+    """Point the agents at the fake models. Importing Agents builds the real clients, so give them a dummy key."""
+    os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+    import Agents
+
+    Agents.llm = FakeChatModel(latency=latency)
+    Agents.structured_llm = fake_structured_llm(latency)
+    return Agents
@@ -0,0 +1,59 @@
+"""
+Regression cases for the rule-based extractor (fast_path.FastPathExtractor)
+against the dataset's address vocabulary: queries the rules fully explain must
+come back as the expected PropertyQuery at confidence 1.0, and queries they
+cannot (unknown places, negations, disjunctions, extra requirements) must stay
+below it so main_agent asks the LLM.
+
+    python -m benchmarks.fast_path_cases
+"""
+import sys
+
+from dataset import load_dataset
+from fast_path import FastPathExtractor
+
+EXPLAINED = {
+    "2 bhk in pune under 80 lakh": {"type": "2BHK", "fullAddress": "Pune", "price": {"min": 0, "max": 8000000.0}},
+    "semi furnished 3 bhk for rent in mumbai": {
+        "furnishedType": "SEMI_FURNISHED", "type": "3BHK", "listingType": "Rent", "fullAddress": "Mumbai"},
+    "flats near pincode 411057": {"pincode": "411057"},
+    "2 bhk possession before dec 2025": {"type": "2BHK", "possessionDate": {"max": "2025-11-30"}},
+    "2 bhk possession by 2026": {"type": "2BHK", "possessionDate": {"max": "2026-01-01"}},
+}
+## must fall back to the LLM
+UNEXPLAINED = [
+    "2 bhk in pune with parking",
+    "2 bhk in pune not furnished",
+    "2 bhk in pune except wakad",
+    "2 bhk in pune without balcony",
+    "2 bhk in mumbai with sea view",
+    "flats in mumbai for my family",
+    "2 bhk or 3 bhk in pune",
+    "2 bhk in pune or mumbai",
+    "2,3 bhk in pune",
+    "2 bhk in atlantis",  # not a place the dataset knows
+]
+
+
+def main():
+    dataset = load_dataset()
+    vocabulary = dataset.location.tokens
+    extractor = FastPathExtractor()
+    failures = []
+    for query, expected in EXPLAINED.items():
+        result, confidence = extractor.extract(query, vocabulary)
+        if result != expected or confidence < 1.0:
+            failures.append(f"{query!r}: {result} at {confidence:.2f}, expected {expected} at 1.00")
+    for query in UNEXPLAINED:
+        result, confidence = extractor.extract(query, vocabulary)
+        if confidence >= 1.0:
+            failures.append(f"{query!r}: {result} at {confidence:.2f}, expected the LLM fallback")
+    dataset.close()
+    for failure in failures:
+        print(failure)
+    print(f"{len(EXPLAINED) + len(UNEXPLAINED) - len(failures)}/{len(EXPLAINED) + len(UNEXPLAINED)} cases ok")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
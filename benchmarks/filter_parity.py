@@ -0,0 +1,130 @@
+"""
+Parity check of the filter backends: for randomly generated PropertyQuery
+dicts, the in-process indexes (Dataset.filter_row_ids, what the per-column
+agents compute), the cost-based planner, the SQL pushdown store and
+optionally the city-sharded process pool must return identical row ids.
+
+    python -m benchmarks.filter_parity --queries 2000 --sharded
+"""
+import argparse
+import time
+
+import numpy as np
+
+from dataset import CATEGORICAL_COLUMNS, LOCATION_COLUMNS, load_dataset
+from indexes import LocationIndex
+from planner import planned_row_ids
+
+
+def random_queries(dataset, count: int, seed: int = 11) -> list:
+    """Mixes of real column values, ranges, dates, locations (some misspelled) and pincode prefixes."""
+    rng = np.random.default_rng(seed)
+    df = dataset.df
+    categories = {c: list(dataset.categorical.values(c)) + ["NOT_A_VALUE"] for c in CATEGORICAL_COLUMNS}
+    tokens = sorted(dataset.location.tokens)
+    pincodes = sorted({str(p) for p in dataset.location.pincodes})
+    prices = df["price"].dropna().to_numpy()
+    areas = df["carpetArea"].dropna().to_numpy()
+
+    def pick(values):
+        return values[rng.integers(len(values))]
+
+    queries = []
+    for _ in range(count):
+        query = {}
+        for column, values in categories.items():
+            if values and rng.random() < 0.3:
+                query[column] = str(pick(values)).lower() if rng.random() < 0.3 else pick(values)
+        if len(prices) and rng.random() < 0.5:
+            low, high = sorted(float(pick(prices)) for _ in range(2))
+            query["price"] = rng.choice([{"min": low, "max": high}, {"min": low, "max": None}, high], p=[0.5, 0.2, 0.3])
+        if len(areas) and rng.random() < 0.3:
+            query["carpetArea"] = float(pick(areas)) if rng.random() < 0.5 else {"min": None, "max": float(pick(areas))}
+        for column in ("bathrooms", "balcony"):
+            if rng.random() < 0.2:
+                query[column] = int(rng.integers(0, 4)) if rng.random() < 0.7 else {"min": 1, "max": 3}
+        if rng.random() < 0.2:
+            year = int(rng.integers(2023, 2030))
+            query["possessionDate"] = rng.choice([f"{year}-01-01", {"min": f"{year}-01-01"}, {"max": f"{year}-06-30"}])
+        if tokens and rng.random() < 0.4:
+            words = [pick(tokens) for _ in range(int(rng.integers(1, 3)))]
+            if rng.random() < 0.3:
+                word = words[0]
+                words[0] = word[:-1] if len(word) > 4 else word + "x"  # misspelled
+            query["fullAddress"] = " ".join(words).title()
+        if pincodes and rng.random() < 0.2:
+            query["pincode"] = pick(pincodes)[: int(rng.integers(3, 7))]
+        queries.append(query)
+    return queries + cross_city_typos(dataset, count // 10, rng)
+
+
+def cross_city_typos(dataset, count: int, rng) -> list:
+    """
+    A misspelled place name plus a pincode from a city where the nearest spelling
+    differs from the nearest one across the whole catalogue, e.g. a landmark word
+    from one city next to another city's pincode. Resolving the typo against that
+    city's rows alone (as a shard would) finds the wrong word.
+    """
+    df = dataset.df
+    if "cityId" not in df.columns:
+        return []
+    location = dataset.location
+    cities = [rows.reset_index(drop=True) for _, rows in df.groupby("cityId", sort=True)]
+    cities = [(rows, LocationIndex(rows, LOCATION_COLUMNS, "pincode")) for rows in cities]
+    words = sorted(t for t in location.tokens if len(t) > 4 and not t.isdigit())
+    queries = {}
+    for _ in range(count * 200):
+        if len(queries) >= count or not words or not cities:
+            break
+        word = words[rng.integers(len(words))]
+        cut = int(rng.integers(1, len(word) - 1))
+        typo = word[:cut] + word[cut + 1:]
+        rows, city = cities[rng.integers(len(cities))]
+        if typo in location.tokens or set(city.similar(typo)) == set(location.similar(typo)) & set(city.tokens):
+            continue
+        ## a pincode of the rows the city-local spelling matches, so a wrong resolution shows up as extra rows
+        pincodes = rows["pincode"].iloc[city.token_rows(typo)].dropna().astype(str).to_numpy()
+        if len(pincodes):
+            query = {"fullAddress": typo.title(), "pincode": pincodes[rng.integers(len(pincodes))]}
+            queries[(query["fullAddress"], query["pincode"])] = query
+    return list(queries.values())
+
+
+def same(a, b) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    return np.array_equal(a, b)
+
+
+def run(name, backend, queries, expected):
+    start = time.perf_counter()
+    results = [backend(q) for q in queries]
+    elapsed = time.perf_counter() - start
+    mismatches = [q for q, a, b in zip(queries, expected, results) if not same(a, b)]
+    if mismatches:
+        raise AssertionError(f"{name} differs from the in-process indexes on {len(mismatches)} queries, e.g. {mismatches[:3]}")
+    print(f"{name:<10} {elapsed / len(queries) * 1e3:8.3f} ms/query   parity: ok")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--sharded", action="store_true", help="also check the process-pool backend")
+    args = parser.parse_args()
+
+    dataset = load_dataset()
+    queries = random_queries(dataset, args.queries)
+    start = time.perf_counter()
+    expected = [dataset.filter_row_ids(q) for q in queries]
+    print(f"rows: {len(dataset):,}  queries: {len(queries):,}")
+    print(f"{'pandas':<10} {(time.perf_counter() - start) / len(queries) * 1e3:8.3f} ms/query")
+
+    run("planner", lambda q: planned_row_ids(dataset, q), queries, expected)
+    run("sql", dataset.sql_filter().filter, queries, expected)
+    if args.sharded:
+        run("sharded", dataset.sharded_filter().filter, queries, expected)
+    dataset.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Import-time budget for the serving entry points. Each module is imported in
+a fresh interpreter (best of --runs); the check fails when one takes longer
+than its budget, and prints the slowest imports underneath it so the
+offender is obvious. Dataset loading, LangGraph and the OpenAI clients must
+stay out of import time (they belong in Workflow.warmup / first use).
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --budget api=0.8
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+## seconds; api includes FastAPI itself
+BUDGETS = {"workflow": 0.7, "api": 1.0}
+
+
+def import_seconds(module: str) -> float:
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=os.environ)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, top: int) -> list:
+    """(cumulative seconds, module) of the slowest imports under `module`, from -X importtime."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         capture_output=True, text=True, check=True, env=os.environ)
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]) / 1e6, parts[2].strip()))
+    return sorted(rows, reverse=True)[1:top + 1]  # the first row is `module` itself
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=SECONDS")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS)
+    for item in args.budget:
+        module, seconds = item.split("=")
+        budgets[module] = float(seconds)
+
+    over = []
+    for module, budget in budgets.items():
+        seconds = min(import_seconds(module) for _ in range(args.runs))
+        status = "ok" if seconds <= budget else "OVER BUDGET"
+        print(f"{module:<12} {seconds:6.3f}s  (budget {budget:.2f}s)  {status}")
+        if seconds > budget:
+            over.append(module)
+            for cumulative, name in slowest_imports(module, args.top):
+                print(f"    {cumulative:6.3f}s  {name}")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Memory report for the in-process listing table: the plain CSV load the
+agents used to hold (object strings, float64, image URLs inline) against
+the compact Dataset (categoricals, nullable small ints, display columns in
+the side store).
+
+    python -m benchmarks.memory --scale 1000
+"""
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+from dataset import Dataset
+from side_store import DISPLAY_COLUMNS, SideStore, side_store_path
+
+
+def tiled(df: pd.DataFrame, scale: int) -> pd.DataFrame:
+    """The table repeated `scale` times, to see how both layouts grow with row count."""
+    return pd.concat([df] * scale, ignore_index=True) if scale > 1 else df
+
+
+def column_bytes(df: pd.DataFrame) -> pd.Series:
+    return df.memory_usage(deep=True, index=False)
+
+
+def mb(value) -> str:
+    return f"{value / 1e6:,.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="cleaned_master_for_chatbot.csv")
+    parser.add_argument("--snapshot", default="cleaned_master_for_chatbot.parquet")
+    parser.add_argument("--scale", type=int, default=1, help="repeat the table this many times")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "listings.csv")
+        snapshot_path = os.path.join(tmp, "listings.parquet")
+        tiled(pd.read_csv(args.csv), args.scale).to_csv(csv_path, index=False)
+        typed = tiled(pd.read_parquet(args.snapshot), args.scale)
+        typed.to_parquet(snapshot_path, index=False)
+        SideStore.build(typed[[c for c in DISPLAY_COLUMNS if c in typed.columns]], side_store_path(snapshot_path))
+
+        before = column_bytes(pd.read_csv(csv_path))
+        dataset = Dataset(snapshot_path)
+        after = column_bytes(dataset.df).reindex(before.index, fill_value=0)
+        side_store_size = os.path.getsize(side_store_path(snapshot_path))
+
+        print(f"rows: {len(dataset):,}\n")
+        print(f"{'column':<18}{'before':>14}{'after':>14}  dtype")
+        for column in before.index:
+            dtype = str(dataset.df[column].dtype) if column in dataset.df.columns else "side store"
+            print(f"{column:<18}{mb(before[column]):>14}{mb(after[column]):>14}  {dtype}")
+        print(f"\n{'total':<18}{mb(before.sum()):>14}{mb(after.sum()):>14}")
+        print(f"reduction:        {before.sum() / max(after.sum(), 1):.1f}x")
+        print(f"side store on disk: {mb(side_store_size)} (fetched for result rows only)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Offline end-to-end benchmark: generates (or reuses) a synthetic catalogue,
+then reports latency percentiles, throughput and peak memory for each stage:
+
+    etl        Data.clean_data on the raw CSVs
+    snapshot   Data.build_snapshot (clean + typed Parquet + side store)
+    load       first registry.current(): snapshot read + index build
+    filter     the configured filter fan-out (Workflow.filter_nodes) per query
+    retrieve   retrieve_agent (intersect + materialize rows) per query
+    e2e        Workflow.execute with the fake LLM
+
+No network access and no API key are needed.
+
+    python -m benchmarks.run --scale 1m --queries 200 --llm-latency 0.3
+"""
+import argparse
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import CITIES, LOCALITY_WORDS, SCALES, generate
+
+QUERY_TEMPLATES = [
+    "{bhk} bhk flats in {locality}",
+    "{bhk}bhk in {city} under {budget} lakh",
+    "ready to move {bhk} bhk apartments in {locality} {city}",
+    "semi furnished {bhk} bhk for rent in {locality}",
+    "{bhk} bhk with {bath} bathrooms between {low} and {budget} lakh",
+    "under construction flats in {city} possession by 2027",
+    "{bhk} bhk above {area} sqft in {locality}",
+    "flats near pincode {pincode}",
+]
+
+
+def peak_rss_mb() -> float:
+    ## ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024)
+
+
+def text_queries(count: int, seed: int = 7) -> list:
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in range(count):
+        city, prefix = CITIES[int(rng.integers(len(CITIES)))]
+        budget = int(rng.integers(40, 300))
+        queries.append(QUERY_TEMPLATES[i % len(QUERY_TEMPLATES)].format(
+            bhk=int(rng.integers(1, 5)), city=city, locality=LOCALITY_WORDS[int(rng.integers(len(LOCALITY_WORDS)))],
+            budget=budget, low=budget // 2, bath=int(rng.integers(1, 4)), area=int(rng.integers(5, 20)) * 100,
+            pincode=f"{prefix}{int(rng.integers(0, 12)):03d}",
+        ))
+    return queries
+
+
+class Report:
+    def __init__(self):
+        self.rows = []
+
+    def once(self, stage: str, fn, items: int = 1):
+        start = time.perf_counter()
+        result = fn()
+        self.add(stage, [time.perf_counter() - start], items)
+        return result
+
+    def add(self, stage: str, seconds: list, items: int = None):
+        seconds = np.asarray(seconds)
+        total = seconds.sum()
+        self.rows.append((stage, len(seconds), np.percentile(seconds, 50), np.percentile(seconds, 95), total,
+                          (items or len(seconds)) / total if total else float("inf"), peak_rss_mb()))
+
+    def print(self):
+        print(f"{'stage':<10} {'calls':>6} {'p50 ms':>10} {'p95 ms':>10} {'total s':>9} {'items/s':>12} {'peak MB':>9}")
+        for stage, calls, p50, p95, total, rate, peak in self.rows:
+            print(f"{stage:<10} {calls:>6} {p50 * 1e3:>10.2f} {p95 * 1e3:>10.2f} {total:>9.2f} {rate:>12,.1f} {peak:>9.0f}")
+
+
+def node_means() -> list:
+    """(node, calls, mean ms) from the tracing histograms."""
+    from tracing import node_seconds
+
+    rows = []
+    for node, series in sorted(node_seconds.series.items()):
+        calls = series[len(node_seconds.buckets)]
+        rows.append((node, calls, series[-1] / calls * 1e3 if calls else 0.0))
+    return rows
+
+
+def filter_stage(report: Report, workflow, dataset, queries: list):
+    from State import merge_dicts
+
+    agent = workflow.agent
+    nodes = workflow.filter_nodes()
+    filter_seconds, retrieve_seconds, matched = [], [], 0
+    for output_dict in queries:
+        state = {"output_dict": output_dict, "dataset_version": dataset.version, "df_dict": {}}
+        start = time.perf_counter()
+        for node in nodes.values():
+            merge_dicts(state["df_dict"], node(state)["df_dict"])
+        filter_seconds.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        final_df = agent.retrieve_agent(state)["df_dict"]["final_filtered_df"]
+        retrieve_seconds.append(time.perf_counter() - start)
+        matched += 0 if final_df is None else len(final_df)
+    report.add("filter", filter_seconds)
+    report.add("retrieve", retrieve_seconds, matched)  # throughput in rows materialized per second
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--rows", type=int, help="variant rows (overrides --scale)")
+    parser.add_argument("--data", help="existing directory of the four source CSVs (skips generation)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per fake LLM call")
+    parser.add_argument("--no-fast-path", action="store_true", help="send every extraction to the (fake) LLM")
+    parser.add_argument("--keep", action="store_true", help="keep the working directory")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="agent-bench-")
+    data_dir = args.data or os.path.join(work_dir, "data")
+    snapshot_path = os.path.join(work_dir, "snapshot.parquet")
+    ## config is read at import time, so point it at the benchmark files before anything imports it
+    os.environ.update({
+        "DATA_DIR": data_dir,
+        "SNAPSHOT_PATH": snapshot_path,
+        "QUERY_CACHE_PATH": os.path.join(work_dir, "query_cache.sqlite"),
+        "TRACE_ENABLED": "1",
+    })
+    if args.no_fast_path:
+        os.environ["FAST_PATH_MIN_CONFIDENCE"] = "2"
+    cwd = os.getcwd()
+    os.chdir(work_dir)  # clean_data also writes cleaned_master_for_chatbot.csv to the working directory
+    report = Report()
+    try:
+        if not args.data:
+            rows = args.rows or SCALES[args.scale]
+            report.once("generate", lambda: generate(data_dir, rows), rows)
+
+        from data_modification import Data
+
+        start = time.perf_counter()
+        etl_rows = len(Data(data_dir).clean_data())
+        report.add("etl", [time.perf_counter() - start], etl_rows)
+        report.once("snapshot", lambda: Data(data_dir).build_snapshot(snapshot_path, force=True), etl_rows)
+
+        from benchmarks import fake_llm
+        from benchmarks.filter_parity import random_queries
+
+        agents = fake_llm.install(args.llm_latency)
+        from workflow import Workflow
+
+        dataset = report.once("load", agents.registry.current, etl_rows)
+        workflow = Workflow().warmup()
+        filter_stage(report, workflow, dataset, random_queries(dataset, args.queries))
+        agents.result_cache.on_swap(dataset.version)  # the filter stage filled it; measure e2e cold
+
+        seconds = []
+        for query in text_queries(args.queries):
+            start = time.perf_counter()
+            workflow.execute({"user_query": query})
+            seconds.append(time.perf_counter() - start)
+        report.add("e2e", seconds)
+
+        print(f"rows: {len(dataset):,}  queries: {args.queries}  fake LLM latency: {args.llm_latency}s  "
+              f"backend: {agents.config.FILTER_BACKEND}  work dir: {work_dir}")
+        report.print()
+        print(f"\n{'node':<24} {'calls':>6} {'mean ms':>10}")
+        for node, calls, mean in node_means():
+            print(f"{node:<24} {calls:>6} {mean:>10.2f}")
+        dataset.close()
+    finally:
+        os.chdir(cwd)
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
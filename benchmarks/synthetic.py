@@ -0,0 +1,165 @@
+"""
+Synthetic catalogue in the schema of the four data/*.csv exports
+(project, ProjectAddress, ProjectConfiguration, ProjectConfigurationVariant),
+scaled to a target number of variant rows with realistic skew: a few metro
+cities and localities hold most listings, most projects are small, 2BHK
+dominates, and prices come in the mixed spellings real exports use.
+
+    python -m benchmarks.synthetic --scale 1m --out bench_data/1m
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+SCALES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+## (city, pincode prefix), most listed first; picked with Zipf-like weights
+CITIES = [
+    ("Mumbai", "400"), ("Pune", "411"), ("Bangalore", "560"), ("Hyderabad", "500"), ("Delhi", "110"),
+    ("Noida", "201"), ("Gurgaon", "122"), ("Chennai", "600"), ("Kolkata", "700"), ("Ahmedabad", "380"),
+    ("Thane", "400"), ("Navi Mumbai", "400"), ("Jaipur", "302"), ("Lucknow", "226"), ("Indore", "452"),
+]
+LOCALITY_WORDS = [
+    "Wakad", "Baner", "Hinjewadi", "Kharadi", "Chembur", "Andheri", "Powai", "Whitefield", "Koramangala",
+    "Gachibowli", "Kondapur", "Dwarka", "Sector 62", "Sohna Road", "Velachery", "Salt Lake", "Bopal",
+    "Ghodbunder Road", "Kharghar", "Malviya Nagar", "Gomti Nagar", "Vijay Nagar", "Aundh", "Viman Nagar",
+    "Hadapsar", "Magarpatta", "Goregaon", "Malad", "Borivali", "Mulund", "Electronic City", "HSR Layout",
+]
+LANDMARKS = ["Metro station", "City mall", "Central park", "IT park", "Railway station", "Highway", "Lake", "School"]
+BHK_TYPES = ["1BHK", "2BHK", "3BHK", "4BHK", "5BHK"]
+BHK_WEIGHTS = [0.22, 0.42, 0.26, 0.08, 0.02]
+IMAGE_BASE = "https://pub-d28896f69c604ec5aa743cb0397740d9.r2.dev"
+
+
+def zipf_weights(n: int, s: float = 1.1) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** s
+    return weights / weights.sum()
+
+
+def ids(prefix: str, count: int, start: int = 0) -> pd.Series:
+    return prefix + pd.Series(np.arange(start, start + count)).astype(str).str.zfill(10)
+
+
+def price_strings(rupees: np.ndarray, rng) -> np.ndarray:
+    """Mostly plain rupee amounts, then lakh/Cr spellings, ₹-formatted and ranged values."""
+    kind = rng.choice(5, size=len(rupees), p=[0.6, 0.15, 0.12, 0.08, 0.05])
+    lakhs = np.round(rupees / 1e5, 1)
+    out = rupees.astype(np.int64).astype(str).astype(object)
+    out[kind == 1] = [f"{v:g} lakh" for v in lakhs[kind == 1]]
+    out[kind == 2] = [f"{v / 100:.2f} Cr" for v in lakhs[kind == 2]]
+    out[kind == 3] = [f"₹{int(v):,}" for v in rupees[kind == 3]]
+    out[kind == 4] = [f"{v:g}-{v + 5:g} lakh" for v in lakhs[kind == 4]]
+    return out
+
+
+def generate(out_dir: str, variants: int, seed: int = 42) -> dict:
+    """Write the four CSVs for `variants` variant rows into `out_dir`; returns row counts per file."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    ## projects: heavy-tailed sizes, so a few large projects hold many configurations/variants
+    n_projects = max(1, variants // 24)
+    city = rng.choice(len(CITIES), size=n_projects, p=zipf_weights(len(CITIES)))
+    locality = rng.choice(len(LOCALITY_WORDS), size=n_projects, p=zipf_weights(len(LOCALITY_WORDS), 0.8))
+    under_construction = rng.random(n_projects) < 0.3
+    possession = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 6 * 365, size=n_projects), unit="D")
+    project_ids = ids("p", n_projects)
+    city_ids = np.array([f"city{i:03d}" for i in range(len(CITIES))])
+    projects = pd.DataFrame({
+        "id": project_ids,
+        "projectType": np.where(rng.random(n_projects) < 0.9, "RESIDENTIAL", "COMMERCIAL"),
+        "projectName": "Project " + pd.Series(np.arange(n_projects)).astype(str),
+        "projectCategory": rng.choice(["STANDALONE", "COMPLEX", "VILLA"], size=n_projects, p=[0.55, 0.4, 0.05]),
+        "slug": "", "slugId": "",
+        "status": np.where(under_construction, "UNDER_CONSTRUCTION", "READY_TO_MOVE"),
+        "projectAge": "", "reraId": "", "countryId": "in", "stateId": "",
+        "cityId": city_ids[city],
+        "localityId": [f"loc{c:03d}{l:03d}" for c, l in zip(city, locality)],
+        "subLocalityId": [f"sub{c:03d}{l:03d}{s}" for c, l, s in zip(city, locality, rng.integers(0, 4, n_projects))],
+        "projectSummary": "",
+        "possessionDate": np.where(under_construction, possession.strftime("%Y-%m-%d 00:00:00"), ""),
+    })
+
+    addresses = pd.DataFrame({
+        "id": ids("a", n_projects),
+        "projectId": project_ids,
+        "landmark": rng.choice(LANDMARKS, size=n_projects),
+        "fullAddress": [f"{LOCALITY_WORDS[l]}, {CITIES[c][0]}" for c, l in zip(city, locality)],
+        "pincode": [f"{CITIES[c][1]}{l:03d}" for c, l in zip(city, locality)],
+    })
+
+    ## configurations: 1-5 BHK types per project, 2BHK most common
+    per_project = np.minimum(rng.geometric(0.45, size=n_projects), len(BHK_TYPES))
+    config_project = np.repeat(np.arange(n_projects), per_project)
+    n_configs = len(config_project)
+    config_type = rng.choice(len(BHK_TYPES), size=n_configs, p=BHK_WEIGHTS)
+    configs = pd.DataFrame({
+        "id": ids("c", n_configs),
+        "projectId": project_ids.to_numpy()[config_project],
+        "propertyCategory": np.where(rng.random(n_configs) < 0.95, "RESIDENTIAL", "COMMERCIAL"),
+        "type": np.array(BHK_TYPES)[config_type],
+        "customBHK": "",
+    })
+
+    projects.to_csv(os.path.join(out_dir, "project.csv"), index=False)
+    addresses.to_csv(os.path.join(out_dir, "ProjectAddress.csv"), index=False)
+    configs.to_csv(os.path.join(out_dir, "ProjectConfiguration.csv"), index=False)
+
+    ## variants: skewed towards popular configurations, written in chunks so 10M rows stay in bounded memory
+    config_weights = zipf_weights(n_configs, 0.6)[rng.permutation(n_configs)]
+    path = os.path.join(out_dir, "ProjectConfigurationVariant.csv")
+    chunk = 1_000_000
+    for start in range(0, variants, chunk):
+        size = min(chunk, variants - start)
+        config = rng.choice(n_configs, size=size, p=config_weights)
+        bhk = config_type[config] + 1
+        area = np.round(bhk * 420 * rng.lognormal(0, 0.25, size=size), 2)
+        rate = np.array([22_000, 9_000, 8_000, 7_000, 12_000, 8_000, 11_000, 8_500, 6_500, 5_500,
+                         13_000, 10_000, 5_000, 5_000, 4_500])[city[config_project[config]]]
+        rupees = np.round(area * rate * rng.lognormal(0, 0.2, size=size), -3)
+        rent = rng.random(size) < 0.15
+        rupees = np.where(rent, np.round(rupees / 300, -2), rupees)
+        variant = pd.DataFrame({
+            "id": ids("v", size, start),
+            "configurationId": configs["id"].to_numpy()[config],
+            "bathrooms": np.clip(bhk + rng.integers(-1, 2, size=size), 1, None),
+            "privateBathrooms": "", "publicBathrooms": "",
+            "balcony": rng.choice(4, size=size, p=[0.1, 0.45, 0.35, 0.1]),
+            "furnishedType": rng.choice(["UNFURNISHED", "SEMI_FURNISHED", "FURNISHED"], size=size, p=[0.5, 0.35, 0.15]),
+            "furnishingType": "[]", "lift": "true", "ageOfProperty": "", "parkingType": "",
+            "listingType": np.where(rent, "Rent", "Sell"),
+            "floorPlanImage": IMAGE_BASE + "/plan-" + pd.Series(np.arange(start, start + size)).astype(str) + ".jpg",
+            "carpetArea": area,
+            "price": price_strings(rupees, rng),
+            "propertyImages": '["' + IMAGE_BASE + "/photo-" + pd.Series(np.arange(start, start + size)).astype(str) + '.jpg"]',
+            "maintenanceCharges": "", "aboutProperty": "",
+            "createdAt": "2025-09-04 18:42:08.748", "updatedAt": "2025-09-04 18:42:08.748",
+        })
+        variant.to_csv(path, index=False, mode="w" if start == 0 else "a", header=start == 0)
+
+    return {"project.csv": n_projects, "ProjectAddress.csv": n_projects,
+            "ProjectConfiguration.csv": n_configs, "ProjectConfigurationVariant.csv": variants}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--rows", type=int, help="variant rows (overrides --scale)")
+    parser.add_argument("--out", default=None, help="output directory (default: bench_data/<scale>)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = args.rows or SCALES[args.scale]
+    out_dir = args.out or os.path.join("bench_data", args.scale if not args.rows else str(rows))
+    start = time.perf_counter()
+    counts = generate(out_dir, rows, args.seed)
+    for name, count in counts.items():
+        print(f"{name:<34} {count:>12,} rows")
+    print(f"written to {out_dir} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
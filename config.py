@@ -0,0 +1,57 @@
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
+## main_agent query-extraction cache (in-memory LRU in front of SQLite)
+QUERY_CACHE_PATH = os.getenv("QUERY_CACHE_PATH", ".cache/query_cache.sqlite")
+QUERY_CACHE_TTL_SECONDS = int(os.getenv("QUERY_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+QUERY_CACHE_MEMORY_SIZE = int(os.getenv("QUERY_CACHE_MEMORY_SIZE", "1024"))
+
+## filter-stage results (row ids) per extracted query and dataset version, LRU-bounded
+FILTER_CACHE_MAX_ENTRIES = int(os.getenv("FILTER_CACHE_MAX_ENTRIES", "4096"))
+FILTER_CACHE_MAX_BYTES = int(os.getenv("FILTER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+## rule-based extractor in front of the LLM; 1.0 means it must explain every word of the query
+FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "1.0"))
+
+## shared connection pool for the OpenAI clients
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+
+## async HTTP service: graph executions allowed in flight at once
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "32"))
+## when the server loads the dataset, graph and LLM clients: "eager" before it accepts requests,
+## "background" on a thread while it already serves, "lazy" on the first request that needs them
+WARMUP_MODE = os.getenv("WARMUP_MODE", "background")
+## POST /admin/reload needs this value in the X-Admin-Token header; empty disables the endpoint
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+## Workflow.execute_batch: LLM calls in flight at once for each batched stage
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+
+## final_agent prompt: at most this many rows / tokens of matched listings
+FINAL_PROMPT_TOKEN_BUDGET = int(os.getenv("FINAL_PROMPT_TOKEN_BUDGET", "3000"))
+FINAL_PROMPT_TOP_K = int(os.getenv("FINAL_PROMPT_TOP_K", "50"))
+
+## retrieve_agent: matches are ranked by closeness to the query and returned this many at a time
+RESULT_PAGE_SIZE = int(os.getenv("RESULT_PAGE_SIZE", "20"))
+
+## final_agent answer mode: "auto" renders small/empty results locally and uses the LLM
+## otherwise, "template" never calls the LLM, "llm" always does
+ANSWER_MODE = os.getenv("ANSWER_MODE", "auto")
+ANSWER_TEMPLATE_MAX_ROWS = int(os.getenv("ANSWER_TEMPLATE_MAX_ROWS", "3"))
+
+## source CSVs and the typed columnar snapshot built from them
+DATA_DIR = os.getenv("DATA_DIR", "data")
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "cleaned_master_for_chatbot.parquet")
+
+## filter stage: "planner" evaluates only the query's predicates in-process, most selective
+## first, "pandas" fans out to the per-column agents the query needs, "sharded" splits the table
+## by cityId and filters the shards on a process pool (FILTER_WORKERS processes),
+## "sql" runs the whole query as one predicate against an embedded SQLite filter store
+FILTER_BACKEND = os.getenv("FILTER_BACKEND", "planner")
+FILTER_WORKERS = int(os.getenv("FILTER_WORKERS", str(os.cpu_count() or 1)))
+
+## per-node tracing of the agent graph (JSON log lines + histograms served at /metrics)
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1") == "1"
+## where api.py / app.py write those lines (logger "agent_graph.trace", INFO); empty means stderr
+TRACE_LOG_FILE = os.getenv("TRACE_LOG_FILE", "")
@@ -1,6 +1,14 @@
 import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
 import re
 from typing import Optional
+from file_lock import file_lock, replacing
+from side_store import DISPLAY_COLUMNS, SideStore, side_store_path
+
+SOURCE_FILES = ["project.csv", "ProjectAddress.csv", "ProjectConfiguration.csv", "ProjectConfigurationVariant.csv"]
 
 def clean_price(value) -> Optional[float]:
     """
@@ -64,6 +72,47 @@ def clean_price(value) -> Optional[float]:
     return num
 
 
+def clean_price_series(values: pd.Series) -> pd.Series:
+    """
+    Vectorized clean_price for a whole column, same rules and results
+    (missing / no digits -> NaN instead of None).
+      - numeric columns are just cast to float
+      - text is deduplicated first, so repeated spellings are parsed once
+      - plain digit strings (the bulk of variant exports) skip the regex extraction
+      - units are applied with a NumPy multiplier instead of per-row branching
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype(float)
+
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    uniques = pd.Series(uniques, dtype=object)
+
+    # mixed object columns: real numbers pass through, everything else is parsed as text
+    is_text = uniques.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    parsed = pd.to_numeric(uniques.where(~is_text), errors="coerce").to_numpy(dtype=float, copy=True)
+
+    s = uniques[is_text].astype("string").str.strip().str.lower()
+    s = s.str.replace(r"[₹,]|inr", "", regex=True).str.strip()
+    s = s.str.replace(r"/?per\s*sq(?:\.| )?ft|psf|/sqft", "", regex=True)
+    s = s.str.replace(r"\b(approx|around|~|estimated|est\.?)\b", "", regex=True).str.strip()
+
+    num = pd.Series(np.nan, index=s.index)
+    plain = s.str.fullmatch(r"[0-9]+(?:\.[0-9]+)?").fillna(False).to_numpy(dtype=bool)
+    num[plain] = s[plain].astype(float)
+
+    rest = s[~plain]
+    bounds = rest.str.extract(r"([0-9]+(?:\.[0-9]+)?)\s*(?:-|to)\s*([0-9]+(?:\.[0-9]+)?)").astype(float)
+    first = rest.str.extract(r"([0-9]+(?:\.[0-9]+)?)", expand=False).astype(float)
+    num[~plain] = ((bounds[0] + bounds[1]) / 2.0).where(bounds[0].notna(), first)
+
+    is_crore = s.str.contains("cr", regex=False).fillna(False).to_numpy(dtype=bool)
+    is_lakh = (s.str.contains("lakh", regex=False) | s.str.contains("lac", regex=False)).fillna(False).to_numpy(dtype=bool)
+    parsed[is_text] = num.to_numpy() * np.where(is_crore, 1e7, np.where(is_lakh, 1e5, 1.0))
+
+    result = np.where(codes >= 0, parsed[np.maximum(codes, 0)], np.nan) if len(parsed) else np.full(len(codes), np.nan)
+    return pd.Series(result, index=values.index, dtype=float)
+
+
 class Data:
     def __init__(self, base_path: str = "data"):
         self.base_path = base_path
@@ -145,7 +194,7 @@ class Data:
 
         # apply clean_price once and safely
         if "price" in chatbot_df.columns:
-            chatbot_df["price"] = chatbot_df["price"].apply(clean_price)
+            chatbot_df["price"] = clean_price_series(chatbot_df["price"])
 
         # Convert carpet area to numeric (coerce bad values to NaN)
         if "carpetArea" in chatbot_df.columns:
@@ -162,5 +211,85 @@ class Data:
         # Reset index and return
         return chatbot_df.reset_index(drop=True)
 
+    def file_fingerprint(self, path: str, previous: Optional[dict] = None) -> dict:
+        """
+        mtime + size + sha256 of a source file. The content hash is only
+        recomputed when mtime or size moved, so an unchanged tree costs one stat per file.
+        """
+        stat = os.stat(path)
+        if previous and previous.get("mtime") == stat.st_mtime and previous.get("size") == stat.st_size:
+            return previous
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": digest.hexdigest()}
+
+    def fingerprints(self, previous: Optional[dict] = None) -> dict:
+        previous = previous or {}
+        return {
+            name: self.file_fingerprint(f"{self.base_path}/{name}", previous.get(name))
+            for name in SOURCE_FILES
+        }
+
+    def to_snapshot_types(self, chatbot_df: pd.DataFrame) -> pd.DataFrame:
+        """Parse everything the filters need once, so loading the snapshot never re-parses strings."""
+        typed = chatbot_df.copy()
+        if "possessionDate" in typed.columns:
+            typed["possessionDate"] = pd.to_datetime(typed["possessionDate"], errors="coerce")
+        for col in ("price", "carpetArea", "bathrooms", "balcony"):
+            if col in typed.columns:
+                typed[col] = pd.to_numeric(typed[col], errors="coerce")
+        if "pincode" in typed.columns:
+            typed["pincode"] = typed["pincode"].map(lambda x: None if pd.isna(x) else str(x).split(".")[0])
+        return typed
+
+    def build_snapshot(self, snapshot_path: str = "cleaned_master_for_chatbot.parquet", force: bool = False) -> str:
+        """
+        Incremental ETL. Rebuilds the typed Parquet snapshot only when a source
+        CSV changed (by content hash) since the last build, otherwise returns
+        the existing snapshot untouched. Returns the snapshot path.
+
+        Every server process calls this, so the check and the rebuild run under
+        an exclusive file lock: the first process rebuilds, the others then find
+        it up to date. The snapshot and its side store are swapped in together
+        under that lock (readers take it shared) and the manifest comes last.
+        """
+        if not all(os.path.exists(f"{self.base_path}/{name}") for name in SOURCE_FILES):
+            if os.path.exists(snapshot_path):
+                return snapshot_path  # deployed without raw sources: serve the last snapshot
+            raise FileNotFoundError(f"No source CSVs in {self.base_path} and no snapshot at {snapshot_path}")
+
+        with file_lock(snapshot_path):
+            return self.refresh_snapshot(snapshot_path, force)
+
+    def refresh_snapshot(self, snapshot_path: str, force: bool) -> str:
+        ## caller holds file_lock(snapshot_path)
+        manifest_path = f"{snapshot_path}.manifest.json"
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+
+        previous = manifest.get("sources", {})
+        current = self.fingerprints(previous)
+        unchanged = {k: v["sha256"] for k, v in current.items()} == {k: v.get("sha256") for k, v in previous.items()}
+
+        built = os.path.exists(snapshot_path) and os.path.exists(side_store_path(snapshot_path))
+        if not force and unchanged and built:
+            if current != previous:
+                self.write_manifest(manifest_path, snapshot_path, current)  # touched but identical content
+            return snapshot_path
+
+        chatbot_df = self.to_snapshot_types(self.clean_data())
+        display = [c for c in DISPLAY_COLUMNS if c in chatbot_df.columns]
+        with replacing(snapshot_path) as tmp_path:  # a uniquely named temp file, renamed in once complete
+            chatbot_df.to_parquet(tmp_path, index=False)
+            SideStore.build(chatbot_df[display], side_store_path(snapshot_path))
+        self.write_manifest(manifest_path, snapshot_path, current)
+        return snapshot_path
 
+    def write_manifest(self, manifest_path: str, snapshot_path: str, sources: dict):
+        with open(manifest_path, "w") as f:
+            json.dump({"snapshot": os.path.basename(snapshot_path), "sources": sources}, f, indent=2)
 
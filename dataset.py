@@ -0,0 +1,456 @@
+import json
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import config
+from data_modification import Data
+from file_lock import file_lock
+from indexes import (
+    EMPTY_ROWS, EPOCH, CategoricalIndex, DateRangeIndex, LocationIndex, NumericRangeIndex, address_tokens,
+    day_number, freeze, intersect_row_ids,
+)
+from side_store import DISPLAY_COLUMNS, SideStore, side_store_path
+
+CATEGORICAL_COLUMNS = ["status", "furnishedType", "type", "listingType"]
+NUMERIC_COLUMNS = ["price", "carpetArea", "bathrooms", "balcony"]
+DATE_COLUMNS = ["possessionDate"]
+LOCATION_COLUMNS = ["fullAddress", "landmark"]
+## every PropertyQuery key that narrows the rows
+FILTER_KEYS = CATEGORICAL_COLUMNS + NUMERIC_COLUMNS + DATE_COLUMNS + ["fullAddress", "pincode"]
+
+## how a bare number from main_agent is read for each numeric column:
+##   price 9000000      -> budget ceiling ("under 90 lakh", "budget 1.5 Cr")
+##   carpetArea 800     -> minimum area ("above 800 sqft")
+##   bathrooms, balcony -> exact count
+SCALAR_RANGE = {"price": "max", "carpetArea": "min", "bathrooms": "exact", "balcony": "exact"}
+
+## repeated strings are stored once per distinct value instead of once per row
+CATEGORY_COLUMNS = CATEGORICAL_COLUMNS + [
+    "projectCategory", "projectType", "propertyCategory", "pincode", "cityId", "localityId",
+    "subLocalityId", "projectName", "fullAddress", "landmark",
+]
+## small counts fit in one or two bytes (nullable, so missing stays missing)
+SMALL_INT_COLUMNS = ["bathrooms", "balcony"]
+
+
+def to_number(value):
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(number) else number
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Categorical dtype for repeated strings and the narrowest lossless nullable int for counts."""
+    for column in CATEGORY_COLUMNS:
+        ## mostly-unique columns (addresses in a small city) would only grow as categoricals
+        if column in df.columns and df[column].nunique() <= len(df) // 2:
+            df[column] = df[column].astype("category")
+    for column in SMALL_INT_COLUMNS:
+        if column not in df.columns:
+            continue
+        values = pd.to_numeric(df[column], errors="coerce")
+        present = values.dropna()
+        if not (present == present.round()).all():
+            continue  # fractional counts keep their float column
+        for dtype, limit in (("Int8", 127), ("Int16", 32767)):
+            if present.abs().le(limit).all():
+                df[column] = values.astype(dtype)
+                break
+    return df
+
+
+def parse_range(column: str, spec):
+    """
+    Turn a numeric value emitted by main_agent into a (min, max) pair.
+        {"min": 0, "max": 12000000}  -> (0.0, 12000000.0)
+        {"min": 5000000, "max": None} -> (5000000.0, None)
+        9000000 for price             -> (None, 9000000.0)
+    Returns None when the value carries no usable bound.
+    """
+    if isinstance(spec, dict):
+        low, high = to_number(spec.get("min")), to_number(spec.get("max"))
+        if low is None and high is None:
+            return None
+        return low, high
+
+    number = to_number(spec)
+    if number is None:
+        return None
+    mode = SCALAR_RANGE.get(column, "exact")
+    if mode == "max":
+        return None, number
+    if mode == "min":
+        return number, None
+    return number, number
+
+
+def to_date(date_input):
+    """
+    Converts any date-like input (string, int year, datetime, etc.)
+    into a Python `date` object (YYYY-MM-DD) with no time part.
+
+    Works great for comparisons and filtering in pandas.
+
+    Examples:
+        'Dec 2025'     -> date(2025, 12, 1)
+        '2025-12-25'   -> date(2025, 12, 25)
+        '2025'         -> date(2025, 1, 1)
+        datetime(2024,3,5,9,0) -> date(2024, 3, 5)
+        None or invalid -> None
+    """
+    if date_input is None or (isinstance(date_input, str) and not date_input.strip()):
+        return None
+
+    # Already a datetime or date
+    if isinstance(date_input, datetime):
+        return date_input.date()
+    if isinstance(date_input, date):
+        return date_input  # already date object
+
+    # If it's a year (int or string)
+    try:
+        year = int(date_input)
+        if 1900 <= year <= 2100:
+            return date(year, 1, 1)
+    except Exception:
+        pass
+
+    # ✅ Correct parsing for ISO formats (YYYY-MM-DD)
+    try:
+        dt = pd.to_datetime(str(date_input), errors="coerce")
+        if pd.notna(dt):
+            return dt.date()  # convert to date (no time)
+    except Exception:
+        pass
+
+    # Fallback: find a 4-digit year in text
+    match = re.search(r"(20\d{2})", str(date_input))
+    if match:
+        return date(int(match.group(1)), 1, 1)
+
+    return None
+
+
+def parse_date_range(value):
+    """
+    Turns the possessionDate emitted by main_agent into inclusive (start, end) dates.
+    Only this single user-supplied value goes through to_date;
+    the dataset column is parsed once at load.
+
+    Examples:
+        '2025-12-01'                                 -> (None, date(2025, 11, 30))  ready before
+        {'max': '2026-01-01'}                        -> (None, date(2026, 1, 1))    ready by
+        {'min': '2024-01-01'}                        -> (date(2024, 1, 1), None)    ready after
+        {'min': '2025-01-01', 'max': '2025-12-31'}   -> ready during 2025
+        unparseable                                  -> None
+    """
+    if isinstance(value,dict):
+        start = to_date(value.get("min"))
+        end = to_date(value.get("max"))
+        if start is None and end is None:
+            return None
+        return start, end
+
+    before = to_date(value)
+    if before is None:
+        return None
+    return None, before - timedelta(days=1)
+
+
+class Dataset:
+    """
+    The cleaned listing table plus the indexes the filter agents query.
+    Everything here is built once at load; agents only do lookups.
+
+    The in-memory table is kept compact: repeated strings are categoricals,
+    small counts are Int8, and the display-only image columns stay in the
+    snapshot's side store until rows() attaches them to an answer.
+    """
+
+    def __init__(self, path: str = "cleaned_master_for_chatbot.csv", df: pd.DataFrame = None):
+        self.path = path
+        self.version = 0  # assigned by DatasetRegistry when the dataset goes live
+        self.side_store = None
+        self.sharded = None  # ShardedFilter, started on first use in the sharded backend
+        self.sql = None  # SqlFilter, opened on first use in the sql backend
+        self.sharded_lock = threading.Lock()
+        if df is not None:
+            self.df = df.reset_index(drop=True)  # an in-memory slice, e.g. one city shard
+        elif path.endswith(".parquet"):
+            if os.path.exists(side_store_path(path)):
+                self.side_store = SideStore(side_store_path(path))
+            columns = None
+            if self.side_store is not None:
+                import pyarrow.parquet as pq
+                columns = [c for c in pq.read_schema(path).names if c not in DISPLAY_COLUMNS]
+            self.df = pd.read_parquet(path, columns=columns)  # typed snapshot: no string/number/date parsing
+        else:
+            self.df = pd.read_csv(path)
+        self.df = compact(self.df)
+        self.categorical = CategoricalIndex(self.df, CATEGORICAL_COLUMNS)
+        self.numeric = NumericRangeIndex(self.df, NUMERIC_COLUMNS)
+        self.dates = DateRangeIndex(self.df, DATE_COLUMNS)
+        self.location = LocationIndex(self.df, LOCATION_COLUMNS, "pincode")
+
+    def __len__(self):
+        return len(self.df)
+
+    def range_rows(self, column: str, spec):
+        """Row ids matching a numeric filter value from main_agent, or None if it is unusable."""
+        bounds = parse_range(column, spec)
+        if bounds is None:
+            return None
+        return self.numeric.range(column, *bounds)
+
+    def date_rows(self, column: str, spec):
+        """Row ids matching a date filter value from main_agent, or None if it is unusable."""
+        bounds = parse_date_range(spec)
+        if bounds is None:
+            return None
+        return self.dates.range(column, *bounds)
+
+    def predicate_row_ids(self, key: str, value):
+        """Row ids matching one PropertyQuery key, or None if the value is not a usable filter."""
+        if key in CATEGORICAL_COLUMNS:
+            return self.categorical.lookup(key, value)
+        if key in NUMERIC_COLUMNS:
+            return self.range_rows(key, value)
+        if key in DATE_COLUMNS:
+            return self.date_rows(key, value)
+        if key == "fullAddress":
+            return self.location.lookup(value)
+        if key == "pincode":
+            return self.location.pincode(value)
+        return None
+
+    def estimate_rows(self, key: str, value):
+        """
+        How many rows one PropertyQuery key matches, read off the index statistics
+        without materializing them (exact except for multi-token locations, where
+        it is the rarest token's count). None if the value is not a usable filter.
+        """
+        if key in CATEGORICAL_COLUMNS:
+            return len(self.categorical.lookup(key, value))
+        if key in NUMERIC_COLUMNS:
+            bounds = parse_range(key, value)
+            return None if bounds is None else self.numeric.count(key, *bounds)
+        if key in DATE_COLUMNS:
+            bounds = parse_date_range(value)
+            return None if bounds is None else self.dates.count(key, *bounds)
+        if key == "fullAddress":
+            tokens = list(dict.fromkeys(address_tokens(value)))
+            return min(len(self.location.token_rows(t)) for t in tokens) if tokens else None
+        if key == "pincode":
+            return self.location.pincode_count(value)
+        return None
+
+    def column_values(self, column: str, row_ids: np.ndarray) -> np.ndarray:
+        """
+        Float values of a numeric or date column at `row_ids`, in the units the
+        range indexes use (dates as days since the epoch); NaN where missing.
+        """
+        if column not in self.df.columns:
+            return np.full(len(row_ids), np.nan)
+        values = self.df[column].take(row_ids)
+        if column in DATE_COLUMNS:
+            parsed = pd.to_datetime(values, errors="coerce").dt.normalize()
+            return (parsed - pd.Timestamp(EPOCH)).dt.days.to_numpy(dtype=float, na_value=np.nan)
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+    def probe_row_ids(self, key: str, value, candidates: np.ndarray) -> np.ndarray:
+        """
+        The subset of `candidates` matching one PropertyQuery key. Range filters
+        test the candidates' own values, which costs O(len(candidates)) however
+        wide the range is; the rest intersect with their index lookup.
+        """
+        if key in NUMERIC_COLUMNS or key in DATE_COLUMNS:
+            if key not in self.df.columns:
+                return EMPTY_ROWS
+            if key in NUMERIC_COLUMNS:
+                low, high = parse_range(key, value)
+            else:
+                low, high = (day_number(bound) for bound in parse_date_range(value))
+            values = self.column_values(key, candidates)
+            mask = ~np.isnan(values)  # missing values never match, as in the range indexes
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+            return freeze(candidates[mask])
+        return intersect_row_ids([candidates, self.predicate_row_ids(key, value)])
+
+    def filter_row_ids(self, output_dict: dict, predicate=None):
+        """
+        Every filter in `output_dict` ANDed together, exactly as the per-column
+        agents plus retrieve_agent would resolve it. None when no filter applies.
+        """
+        predicate = predicate or self.predicate_row_ids
+        row_id_sets = [predicate(key, output_dict[key]) for key in FILTER_KEYS if key in output_dict]
+        row_id_sets = [row_ids for row_ids in row_id_sets if row_ids is not None]
+        return intersect_row_ids(row_id_sets) if row_id_sets else None
+
+    def filter_row_ids_batch(self, output_dicts: list) -> list:
+        """
+        filter_row_ids for many queries in one pass: identical filter sets are
+        resolved once, and so is every (key, value) predicate they share.
+        """
+        predicates = {}
+
+        def predicate(key, value):
+            memo = (key, json.dumps(value, sort_keys=True, default=str))
+            if memo not in predicates:
+                predicates[memo] = self.predicate_row_ids(key, value)
+            return predicates[memo]
+
+        results = {}
+        for output_dict in output_dicts:
+            memo = json.dumps(output_dict, sort_keys=True, default=str)
+            if memo not in results:
+                results[memo] = self.filter_row_ids(output_dict, predicate)
+        return [results[json.dumps(output_dict, sort_keys=True, default=str)] for output_dict in output_dicts]
+
+    def rows(self, row_ids: np.ndarray) -> pd.DataFrame:
+        """Materialize the given row ids as a DataFrame, display columns included."""
+        rows = self.df.take(row_ids)
+        if self.side_store is None:
+            return rows
+        display = self.side_store.fetch(row_ids)
+        display.index = rows.index
+        return pd.concat([rows, display], axis=1)
+
+    def sharded_filter(self):
+        """The process-pool filter over this version's city shards, started on first use."""
+        with self.sharded_lock:
+            if self.sharded is None:
+                from sharding import ShardedFilter
+                self.sharded = ShardedFilter(self, config.FILTER_WORKERS)
+            return self.sharded
+
+    def sql_filter(self):
+        """
+        The SQLite filter store for this version, opened on first use. It is
+        (re)built from this table when it is missing or older than the snapshot.
+        """
+        with self.sharded_lock:
+            if self.sql is None:
+                from sql_backend import SqlFilter, filter_store_path
+                path = filter_store_path(self.path)
+                with file_lock(path):  # one process (re)builds it, the others wait and reuse it
+                    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(self.path):
+                        SqlFilter.build(self.df, path)
+                self.sql = SqlFilter(path, self.location)
+            return self.sql
+
+    def close(self):
+        """Release the worker pool / SQL connection of a dataset version that is no longer served."""
+        if self.sharded is not None:
+            self.sharded.close()
+            self.sharded = None
+        if self.sql is not None:
+            self.sql.close()
+            self.sql = None
+
+    def memory_usage(self) -> int:
+        """Bytes held by the in-memory table (strings counted in full)."""
+        return int(self.df.memory_usage(deep=True).sum())
+
+
+def load_dataset() -> Dataset:
+    """Refresh the columnar snapshot if its source CSVs changed, then load it."""
+    snapshot_path = Data(config.DATA_DIR).build_snapshot(config.SNAPSHOT_PATH)
+    with file_lock(snapshot_path, shared=True):  # never between another process's snapshot and side-store swaps
+        return Dataset(snapshot_path)
+
+
+class DatasetRegistry:
+    """
+    Holds the live Dataset under a monotonically increasing version id.
+
+    reload() builds the next version (snapshot refresh + indexes) without
+    blocking readers, then swaps it in atomically. Requests pin the version
+    they start on with acquire()/release(), so in-flight work finishes on the
+    same table even if a swap happens meanwhile; unpinned old versions are
+    dropped right after the swap. on_swap() callbacks let caches react to a new version.
+    """
+
+    def __init__(self, loader=load_dataset):
+        self.loader = loader
+        self.lock = threading.Lock()  # guards the version table
+        self.reload_lock = threading.Lock()  # one build at a time
+        self.datasets = {}  # version -> Dataset
+        self.pins = {}  # version -> in-flight requests
+        self.latest = 0
+        self.listeners = []
+        self.reload_thread = None
+
+    def current(self) -> Dataset:
+        if self.latest == 0:
+            with self.reload_lock:
+                if self.latest == 0:
+                    self.swap(self.loader())
+        with self.lock:
+            return self.datasets[self.latest]
+
+    def get(self, version=None) -> Dataset:
+        """The dataset for a pinned version, or the live one when no version is given."""
+        if version is None:
+            return self.current()
+        with self.lock:
+            return self.datasets[version]
+
+    def acquire(self) -> int:
+        """Pin the live version for one request and return its id."""
+        self.current()
+        with self.lock:
+            version = self.latest
+            self.pins[version] = self.pins.get(version, 0) + 1
+            return version
+
+    def release(self, version: int):
+        with self.lock:
+            self.pins[version] -= 1
+            if self.pins[version] == 0:
+                del self.pins[version]
+            self.evict()
+
+    def reload(self) -> int:
+        """Build the next version and make it live; returns its id."""
+        with self.reload_lock:
+            return self.swap(self.loader())
+
+    def reload_in_background(self):
+        """Start a reload on a thread; None (nothing started) while a build is already running."""
+        with self.lock:
+            if self.reload_lock.locked() or (self.reload_thread is not None and self.reload_thread.is_alive()):
+                return None
+            self.reload_thread = threading.Thread(target=self.reload, name="dataset-reload", daemon=True)
+            self.reload_thread.start()
+            return self.reload_thread
+
+    def on_swap(self, callback):
+        self.listeners.append(callback)
+
+    def swap(self, dataset: Dataset) -> int:
+        with self.lock:
+            self.latest += 1
+            dataset.version = self.latest
+            self.datasets[self.latest] = dataset
+            self.evict()
+            version = self.latest
+        for callback in self.listeners:
+            callback(version)
+        return version
+
+    def evict(self):
+        ## caller holds self.lock
+        for version in list(self.datasets):
+            if version != self.latest and version not in self.pins:
+                self.datasets.pop(version).close()
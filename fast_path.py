@@ -0,0 +1,222 @@
+import re
+from datetime import date, timedelta
+from typing import Tuple
+
+from data_modification import clean_price
+from indexes import ADDRESS_STOP_WORDS
+from query_cache import normalize_query
+from validation import PropertyQuery
+
+## words that carry no filter on their own; they never lower the confidence
+FILLER_WORDS = {
+    "i", "me", "my", "we", "us", "a", "an", "the", "is", "are", "be", "should", "want", "need", "looking",
+    "look", "for", "show", "find", "get", "give", "search", "searching", "any", "some", "all", "please",
+    "with", "and", "of", "in", "at", "near", "around", "to", "which", "that", "it", "property",
+    "properties", "flat", "flats", "apartment", "apartments", "home", "homes", "house", "houses", "unit",
+    "units", "option", "options", "listing", "listings", "carpet", "area", "price", "priced", "budget",
+    "cost", "costing", "rs", "₹", "possession", "available", "having", "has", "have", "project", "projects",
+    "expected", "expecting", "pincode", "pin", "code", "located", "location", "city",
+}
+
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6}
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+MONTH_DAYS = {2: 28, 4: 30, 6: 30, 9: 30, 11: 30}
+
+AMOUNT = r"₹?\s*(\d+(?:\.\d+)?)\s*(cr|lakh)?"
+UPPER_WORDS = r"under|below|upto|up to|within|less than|max(?:imum)?|not more than|budget(?: of| is)?"
+LOWER_WORDS = r"above|over|more than|min(?:imum)?|at least|starting(?: from| at)?"
+
+PATTERNS = {
+    "type": re.compile(r"\b(\d+|" + "|".join(NUMBER_WORDS) + r")\s*bhk\b"),
+    "price_range": re.compile(r"(?:between|from)?\s*" + AMOUNT + r"\s*(?:-|to|and)\s*" + AMOUNT),
+    "price_bound": re.compile(
+        r"\b(" + UPPER_WORDS + "|" + LOWER_WORDS + r")?\s*(?:(?:price|budget|cost|of|is)\s+)*" + AMOUNT),
+    "carpetArea": re.compile(r"\b(" + UPPER_WORDS + "|" + LOWER_WORDS + r")?\s*(\d+(?:\.\d+)?)\s*sqft\b"),
+    "furnishedType": re.compile(r"\b(semi[\s-]?furnished|un[\s-]?furnished|(?:fully\s+)?furnished)\b"),
+    "status": re.compile(r"\b(ready[\s-]*to[\s-]*move(?:[\s-]*in)?|immediate possession|under[\s-]*construction)\b"),
+    "possessionDate": re.compile(
+        r"\b(?:possession|ready|handover|completion)?\s*(by|before|until|till|after|from|in)\s+"
+        r"(?:(" + "|".join(MONTHS) + r")[a-z]*\.?\s+)?(20\d{2})\b"),
+    "listingType": re.compile(r"\b(for rent|on rent|rental|to rent|for sale|resale|to buy|for buying)\b"),
+    "bathrooms": re.compile(r"\b(\d+|" + "|".join(NUMBER_WORDS) + r")\s*(?:bathrooms?|baths?|washrooms?|toilets?)\b"),
+    "balcony": re.compile(r"\b(\d+|" + "|".join(NUMBER_WORDS) + r")\s*balcon(?:y|ies)\b"),
+    "projectType": re.compile(r"\b(residential|commercial)\b"),
+    "projectCategory": re.compile(r"\b(standalone|complex)\b"),
+    "pincode": re.compile(r"(?<![\d.])(\d{6})(?![\d.]|\s*(?:cr|lakh|sqft))"),
+}
+## "2 bhk or 3 bhk", "in pune or mumbai": a single-valued filter cannot hold either side
+CONJUNCTIONS = {"or", "and"}
+## "not furnished", "except baner", "without balcony": the rules would extract the opposite
+NEGATIONS = {"not", "no", "without", "except"}
+## a location phrase runs to the next recognized constraint, or to a word that starts another clause
+LOCATION = re.compile(r"\b(?:in|at|near|around)\s+([a-z][a-z ]*?)\s*(?=\||\b(?:with|for|having|which|that)\b|$)")
+
+## consumed spans are replaced by this marker so later rules cannot re-match them
+## and a location phrase stops at the next recognized constraint
+GAP = " | "
+
+
+def to_int(token: str) -> int:
+    return NUMBER_WORDS.get(token, None) or int(token)
+
+
+def rupees(number: str, unit) -> float:
+    return clean_price(f"{number} {unit or ''}")
+
+
+def period(mode: str, month, year: str) -> dict:
+    year = int(year)
+    start_month = MONTHS[month] if month else 1
+    start = f"{year}-{start_month:02d}-01"
+    if mode == "before":
+        return {"max": (date(year, start_month, 1) - timedelta(days=1)).isoformat()}  # bounds are inclusive
+    if mode in ("by", "until", "till"):
+        return {"max": start}
+    if mode in ("after", "from"):
+        return {"min": start}
+    end_month = start_month if month else 12
+    leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    last_day = 29 if end_month == 2 and leap else MONTH_DAYS.get(end_month, 31)
+    return {"min": start, "max": f"{year}-{end_month:02d}-{last_day:02d}"}
+
+
+class FastPathExtractor:
+    """
+    Deterministic extractor for the common query vocabulary (BHK counts,
+    lakh/cr budgets, sqft, furnishing, ready to move, pincodes, possession
+    years, ...). Returns a PropertyQuery plus a confidence in [0, 1]: the share
+    of meaningful words in the query that a rule explained. main_agent only
+    falls back to the LLM when the confidence is below its threshold.
+    A rule matching twice or a location joined by or/and is a disjunction the
+    rules cannot express, and a negation would be extracted inverted; either
+    drops the confidence to 0 and the LLM decides.
+
+    `vocabulary` is the set of known address tokens (LocationIndex.tokens):
+    location words outside it stay unexplained. None accepts every word.
+    """
+
+    def extract(self, user_query: str, vocabulary=None) -> Tuple[PropertyQuery, float]:
+        text = normalize_query(user_query)
+        content_words = [w for w in text.split() if w not in FILLER_WORDS]
+        if not content_words:
+            return {}, 0.0
+
+        result: PropertyQuery = {}
+        matches = {}
+        text = self.apply(text, "price_range", result, self.price_range, matches)
+        for key, handler in (
+            ("type", self.bhk),
+            ("carpetArea", self.carpet_area),
+            ("price_bound", self.price_bound),
+            ("furnishedType", self.furnished),
+            ("status", self.status),
+            ("possessionDate", self.possession),
+            ("listingType", self.listing),
+            ("bathrooms", self.count("bathrooms")),
+            ("balcony", self.count("balcony")),
+            ("projectType", self.upper("projectType")),
+            ("projectCategory", self.upper("projectCategory")),
+            ("pincode", self.pincode),
+        ):
+            text = self.apply(text, key, result, handler, matches)
+
+        def location(match):
+            words = [w for w in match.group(1).split() if w not in FILLER_WORDS]
+            if CONJUNCTIONS & set(match.group(1).split()):
+                matches["fullAddress"] = 2
+                return GAP
+            known = [w for w in words if w not in NEGATIONS and (vocabulary is None or w in vocabulary)]
+            if known:
+                result["fullAddress"] = " ".join(w.capitalize() for w in known)
+            ## words that name no known place stay in the text and count against the confidence
+            ## ("road", "opp", ... are ignored by the address index, so they need no explaining)
+            return GAP + " ".join(w for w in words if w not in known and
+                                  (w in NEGATIONS or w not in ADDRESS_STOP_WORDS))
+        text = LOCATION.sub(location, text, count=1)
+
+        leftover = [w for w in text.replace("|", " ").split() if w not in FILLER_WORDS]
+        if any(count > 1 for count in matches.values()) or NEGATIONS & set(leftover):
+            return result, 0.0
+        confidence = 1.0 - len(leftover) / len(content_words)
+        return result, max(confidence, 0.0)
+
+    def apply(self, text, key, result, handler, matches):
+        def replace(match):
+            if not handler(match, result):
+                return match.group(0)
+            matches[key] = matches.get(key, 0) + 1
+            return GAP
+        return PATTERNS[key].sub(replace, text)
+
+    ## --- rule handlers: write into `result`, return True if the match was used ---
+
+    def bhk(self, match, result):
+        result["type"] = f"{to_int(match.group(1))}BHK"
+        return True
+
+    def price_range(self, match, result):
+        low, low_unit, high, high_unit = match.groups()
+        if not (low_unit or high_unit):
+            return False
+        result["price"] = {"min": rupees(low, low_unit or high_unit), "max": rupees(high, high_unit or low_unit)}
+        return True
+
+    def price_bound(self, match, result):
+        word, number, unit = match.groups()
+        if unit is None or "price" in result:
+            return False
+        value = rupees(number, unit)
+        if word and re.fullmatch(LOWER_WORDS, word):
+            result["price"] = {"min": value, "max": None}
+        else:
+            result["price"] = {"min": 0, "max": value}
+        return True
+
+    def carpet_area(self, match, result):
+        word, number = match.groups()
+        value = float(number)
+        if word and re.fullmatch(UPPER_WORDS, word):
+            result["carpetArea"] = {"min": None, "max": value}
+        else:
+            result["carpetArea"] = value
+        return True
+
+    def furnished(self, match, result):
+        word = match.group(1).replace(" ", "").replace("-", "")
+        if word.startswith("semi"):
+            result["furnishedType"] = "SEMI_FURNISHED"
+        elif word.startswith("un"):
+            result["furnishedType"] = "UNFURNISHED"
+        else:
+            result["furnishedType"] = "FURNISHED"
+        return True
+
+    def status(self, match, result):
+        result["status"] = "UNDER_CONSTRUCTION" if match.group(1).startswith("under") else "READY_TO_MOVE"
+        return True
+
+    def possession(self, match, result):
+        mode, month, year = match.groups()
+        result["possessionDate"] = period(mode, month, year)
+        return True
+
+    def listing(self, match, result):
+        result["listingType"] = "Rent" if "rent" in match.group(1) else "Sell"
+        return True
+
+    def count(self, key):
+        def handler(match, result):
+            result[key] = to_int(match.group(1))
+            return True
+        return handler
+
+    def upper(self, key):
+        def handler(match, result):
+            result[key] = match.group(1).upper()
+            return True
+        return handler
+
+    def pincode(self, match, result):
+        result["pincode"] = match.group(1)
+        return True
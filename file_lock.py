@@ -0,0 +1,49 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single dev server, nothing to coordinate with
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False):
+    """
+    Advisory lock on `path` + ".lock", held for the block across processes (every
+    uvicorn worker builds and loads the same files). Builders take it exclusively,
+    readers that must see a consistent set of files take it shared.
+    """
+    with open(f"{path}.lock", "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def temp_path(path: str) -> str:
+    """A new, uniquely named empty file next to `path` (same filesystem, so os.replace onto `path` is atomic)."""
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{name}.", suffix=".tmp")
+    os.close(fd)
+    return tmp_path
+
+
+@contextmanager
+def replacing(path: str):
+    """
+    Yields a fresh temp path to write the new version of `path` to; on success it
+    is renamed over `path`, on error it is removed and `path` is left untouched.
+    """
+    tmp_path = temp_path(path)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
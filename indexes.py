@@ -0,0 +1,297 @@
+import re
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_category(value):
+    """
+    Normalize a categorical value the same way the filter agents compare it:
+        " ready_to_move " -> "READY_TO_MOVE"
+        None / NaN        -> None
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str) and pd.isna(value):
+        return None
+    return str(value).strip().upper()
+
+
+def freeze(row_ids):
+    """Mark a row-id array read-only so callers cannot corrupt the shared index."""
+    row_ids.flags.writeable = False
+    return row_ids
+
+
+EMPTY_ROWS = freeze(np.empty(0, dtype=np.int64))
+
+
+class CategoricalIndex:
+    """
+    Inverted index over low-cardinality columns, built once when the dataset loads.
+
+        {column: {normalized value: sorted array of row ids}}
+
+    A lookup is a dict access instead of a full string-normalizing scan of the column.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns):
+        self.index = {}
+        for column in columns:
+            if column not in df.columns:
+                continue
+            self.index[column] = self.build_column(df[column])
+
+    def build_column(self, values: pd.Series) -> dict:
+        mask = values.notna().to_numpy()
+        row_ids = np.flatnonzero(mask).astype(np.int64)
+        normalized = values[mask].astype(str).str.strip().str.upper().to_numpy()
+
+        codes, uniques = pd.factorize(normalized)
+        ## stable sort keeps the row ids of every value in ascending order
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        return {
+            value: freeze(row_ids[order[bounds[i]:bounds[i + 1]]])
+            for i, value in enumerate(uniques)
+        }
+
+    def lookup(self, column: str, value) -> np.ndarray:
+        """Row ids whose `column` equals `value` (case/whitespace-insensitive)."""
+        key = normalize_category(value)
+        if key is None:
+            return EMPTY_ROWS
+        return self.index.get(column, {}).get(key, EMPTY_ROWS)
+
+    def values(self, column: str) -> list:
+        return list(self.index.get(column, {}).keys())
+
+
+class NumericRangeIndex:
+    """
+    Sorted-array index over numeric columns, built once when the dataset loads.
+
+        {column: (sorted values, row ids in the same order)}
+
+    Range and exact queries are two binary searches plus a slice, O(log n + k).
+    Rows with a missing value are left out of the index and never match.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns):
+        self.index = {}
+        for column in columns:
+            if column not in df.columns:
+                continue
+            values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            row_ids = np.flatnonzero(~np.isnan(values)).astype(np.int64)
+            order = np.argsort(values[row_ids], kind="stable")
+            self.index[column] = (values[row_ids][order], row_ids[order])
+
+    def bounds(self, column: str, min_value=None, max_value=None):
+        """Slice [lo, hi) of the sorted arrays that falls inside the range."""
+        sorted_values, _ = self.index[column]
+        lo = 0 if min_value is None else int(np.searchsorted(sorted_values, min_value, side="left"))
+        hi = len(sorted_values) if max_value is None else int(np.searchsorted(sorted_values, max_value, side="right"))
+        return lo, max(hi, lo)
+
+    def range(self, column: str, min_value=None, max_value=None) -> np.ndarray:
+        """Row ids with min_value <= column <= max_value; a None bound is open."""
+        if column not in self.index:
+            return EMPTY_ROWS
+        lo, hi = self.bounds(column, min_value, max_value)
+        if hi == lo:
+            return EMPTY_ROWS
+        _, row_ids = self.index[column]
+        ## keep row ids ascending, like every other index lookup
+        return freeze(np.sort(row_ids[lo:hi]))
+
+    def exact(self, column: str, value) -> np.ndarray:
+        return self.range(column, value, value)
+
+    def count(self, column: str, min_value=None, max_value=None) -> int:
+        """Number of rows in the range, without materializing them."""
+        if column not in self.index:
+            return 0
+        lo, hi = self.bounds(column, min_value, max_value)
+        return hi - lo
+
+
+
+EPOCH = date(1970, 1, 1)
+
+
+def day_number(value):
+    """date -> days since 1970-01-01 (None stays None)."""
+    if value is None:
+        return None
+    return (value - EPOCH).days
+
+
+class DateRangeIndex(NumericRangeIndex):
+    """
+    NumericRangeIndex over date columns. Dates are parsed once at load and
+    stored as days since the epoch, so queries never re-parse the column.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns):
+        days = {}
+        for column in columns:
+            if column not in df.columns:
+                continue
+            parsed = pd.to_datetime(df[column], errors="coerce").dt.normalize()
+            days[column] = (parsed - pd.Timestamp(EPOCH)).dt.days
+        super().__init__(pd.DataFrame(days, index=df.index), list(days.keys()))
+
+    def range(self, column: str, start=None, end=None) -> np.ndarray:
+        """Row ids with start <= column <= end, both `date` objects; None is open."""
+        return super().range(column, day_number(start), day_number(end))
+
+    def count(self, column: str, start=None, end=None) -> int:
+        return super().count(column, day_number(start), day_number(end))
+
+## connective words in addresses that never narrow a location on their own
+ADDRESS_STOP_WORDS = {
+    "near", "opp", "opposite", "beside", "behind", "next", "to", "the", "and", "of", "at", "in", "no",
+    "sr", "road", "rd", "street", "st", "india",
+}
+## minimum trigram similarity for a misspelled token ("wakkad") to stand in for a known one ("wakad")
+FUZZY_MIN_SIMILARITY = 0.4
+## misspellings remembered per index; users choose the tokens, so the memo is LRU-bounded
+FUZZY_CACHE_SIZE = 4096
+
+
+def address_tokens(value) -> list:
+    """ "Wakad, Pune 411057" -> ["wakad", "pune", "411057"] """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return []
+    return [t for t in re.findall(r"[a-z0-9]+", str(value).lower()) if t not in ADDRESS_STOP_WORDS]
+
+
+def trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LocationIndex:
+    """
+    Address index over free-text location columns plus the pincode column,
+    built once when the dataset loads.
+
+        tokens:   {address token: sorted array of row ids}
+        trigrams: {trigram: set of address tokens}    (for misspellings)
+        pincodes: sorted pincode strings + row ids    (for prefix lookups)
+
+    A location like "Baner, Pune" matches rows whose address/landmark contain
+    every token; a token missing from the vocabulary is replaced by its closest
+    spellings by trigram similarity, so no lookup ever scans the addresses.
+    """
+
+    def __init__(self, df: pd.DataFrame, text_columns, pincode_column: str = "pincode"):
+        postings = {}
+        for column in text_columns:
+            if column not in df.columns:
+                continue
+            ## tokenize each distinct address once, then fan out to its rows
+            codes, uniques = pd.factorize(df[column])
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            for i, value in enumerate(uniques):
+                rows = order[bounds[i]:bounds[i + 1]]
+                for token in set(address_tokens(value)):
+                    postings.setdefault(token, []).append(rows)
+        self.tokens = {
+            token: freeze(np.unique(np.concatenate(parts)).astype(np.int64))
+            for token, parts in postings.items()
+        }
+        self.trigrams = {}
+        for token in self.tokens:
+            for gram in trigrams(token):
+                self.trigrams.setdefault(gram, set()).add(token)
+        self.fuzzy_cache = OrderedDict()  # token -> closest spellings, least recently used first
+        self.fuzzy_lock = threading.Lock()
+
+        self.pincodes = np.empty(0, dtype=object)
+        self.pincode_rows = EMPTY_ROWS
+        if pincode_column in df.columns:
+            mask = df[pincode_column].notna().to_numpy()
+            values = df[pincode_column][mask].astype(str).str.strip().str.split(".").str[0].to_numpy(dtype=object)
+            row_ids = np.flatnonzero(mask).astype(np.int64)
+            order = np.argsort(values, kind="stable")
+            self.pincodes = values[order]
+            self.pincode_rows = row_ids[order]
+
+    def similar(self, token: str) -> list:
+        """Known tokens spelled closest to `token` (empty if nothing is close enough)."""
+        with self.fuzzy_lock:
+            if token in self.fuzzy_cache:
+                self.fuzzy_cache.move_to_end(token)
+                return self.fuzzy_cache[token]
+        grams = trigrams(token)
+        shared = {}
+        for gram in grams:
+            for candidate in self.trigrams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        scored = {c: n / len(grams | trigrams(c)) for c, n in shared.items()}
+        best = max(scored.values(), default=0.0)
+        spellings = [c for c, score in scored.items() if score == best] if best >= FUZZY_MIN_SIMILARITY else []
+        with self.fuzzy_lock:
+            self.fuzzy_cache[token] = spellings
+            if len(self.fuzzy_cache) > FUZZY_CACHE_SIZE:
+                self.fuzzy_cache.popitem(last=False)
+        return spellings
+
+    def token_rows(self, token: str) -> np.ndarray:
+        if token in self.tokens:
+            return self.tokens[token]
+        if token.isdigit() or len(token) < 4:
+            return EMPTY_ROWS  # numbers and short tokens are too ambiguous to guess at
+        matches = [self.tokens[t] for t in self.similar(token)]
+        if not matches:
+            return EMPTY_ROWS
+        return matches[0] if len(matches) == 1 else np.unique(np.concatenate(matches))
+
+    def lookup(self, location):
+        """Row ids whose address/landmark match every token of `location`; None if it has no tokens."""
+        tokens = list(dict.fromkeys(address_tokens(location)))
+        if not tokens:
+            return None
+        return intersect_row_ids([self.token_rows(token) for token in tokens])
+
+    def pincode_bounds(self, prefix):
+        """Slice [lo, hi) of the sorted pincodes starting with `prefix`; None if it is blank."""
+        prefix = "" if prefix is None else re.sub(r"\D", "", str(prefix).split(".")[0])
+        if not prefix:
+            return None
+        lo = np.searchsorted(self.pincodes, prefix, side="left")
+        hi = np.searchsorted(self.pincodes, prefix + "\uffff", side="right")
+        return lo, hi
+
+    def pincode(self, prefix):
+        """Row ids whose pincode starts with `prefix` ("411" -> all of Pune 411xxx); None if it is blank."""
+        bounds = self.pincode_bounds(prefix)
+        if bounds is None:
+            return None
+        lo, hi = bounds
+        return freeze(np.sort(self.pincode_rows[lo:hi]))
+
+    def pincode_count(self, prefix):
+        """Number of rows pincode(prefix) would return, without materializing them."""
+        bounds = self.pincode_bounds(prefix)
+        return None if bounds is None else int(bounds[1] - bounds[0])
+
+
+def intersect_row_ids(row_id_sets) -> np.ndarray:
+    """
+    AND together sorted row-id arrays. Starts from the smallest set so every
+    step costs at most the size of the running result, and stops once it is empty.
+    """
+    ordered = sorted(row_id_sets, key=len)
+    result = ordered[0]
+    for row_ids in ordered[1:]:
+        if len(result) == 0:
+            break
+        result = np.intersect1d(result, row_ids, assume_unique=True)
+    return result
@@ -1,17 +1,53 @@
-from dotenv import load_dotenv
-load_dotenv() ## activating up all the secret variables 
-from validation import PropertyQuery
-from langchain_openai import ChatOpenAI
-llm = ChatOpenAI(model = "gpt-4.1")
-structured_llm = llm.with_structured_output(PropertyQuery)
+import asyncio
+import threading
+import config
+
 
 class LLM:
-    def __init__(self):
-        self.llm = llm
-        self.structured_llm = structured_llm
+    """
+    The chat model and its PropertyQuery-structured twin on pooled HTTP clients.
+    Built on first use and shared by every LLM() in the process, so importing
+    this module stays cheap (langchain_openai + openai alone take over a second).
+    """
+    _models = None ## (llm, structured_llm)
+    _clients = None ## (http_client, http_async_client)
+    _lock = threading.Lock()
+
+    def build(self):
+        if LLM._models is None:
+            with LLM._lock:
+                if LLM._models is None:
+                    import httpx
+                    from langchain_openai import ChatOpenAI
+                    from validation import PropertyQuery
+
+                    ## one pooled HTTP client per flavour, shared by every model so connections are reused
+                    limits = httpx.Limits(
+                        max_connections = config.LLM_MAX_CONNECTIONS,
+                        max_keepalive_connections = config.LLM_MAX_CONNECTIONS,
+                    )
+                    http_client = httpx.Client(limits = limits)
+                    http_async_client = httpx.AsyncClient(limits = limits)
+                    llm = ChatOpenAI(model = "gpt-4.1",http_client = http_client,http_async_client = http_async_client)
+                    LLM._clients = (http_client,http_async_client)
+                    LLM._models = (llm,llm.with_structured_output(PropertyQuery))
+        return LLM._models
+
+    async def abuild(self):
+        """build() for async callers: the first build runs on a worker thread, never on the event loop."""
+        if LLM._models is None:
+            await asyncio.to_thread(self.build)
+        return LLM._models
 
     def get_llm(self):
-        return self.llm
+        return self.build()[0]
     def get_structured_llm(self):
-        return self.structured_llm
+        return self.build()[1]
 
+    async def aclose(self):
+        """Release the pooled connections (called on server shutdown); a no-op if they were never built."""
+        if LLM._clients is None:
+            return
+        http_client, http_async_client = LLM._clients
+        await http_async_client.aclose()
+        http_client.close()
@@ -0,0 +1,47 @@
+from dataset import FILTER_KEYS
+from indexes import intersect_row_ids
+
+
+def plan(dataset, output_dict: dict) -> list:
+    """
+    The filter steps for one PropertyQuery, most selective first:
+        {"type": "2BHK", "price": 9e6, "fullAddress": "Wakad"}
+        -> [("fullAddress", 310), ("type", 4_200), ("price", 61_000)]
+    Only keys the query mentions are planned; unusable values are dropped.
+    Estimates come from the index statistics (Dataset.estimate_rows), so
+    planning never touches the rows themselves.
+    """
+    steps = []
+    for key in FILTER_KEYS:
+        if key not in (output_dict or {}):
+            continue
+        estimate = dataset.estimate_rows(key, output_dict[key])
+        if estimate is not None:
+            steps.append((key, estimate))
+    return sorted(steps, key=lambda step: step[1])
+
+
+def run_plan(dataset, output_dict: dict, steps: list):
+    """
+    Evaluate planned steps in order. The first step materializes its row ids;
+    every later one either probes the running candidates (when they are fewer
+    than the rows the step would match) or intersects with its lookup, and the
+    loop stops as soon as no candidate is left. None when nothing was planned.
+    """
+    candidates = None
+    for key, estimate in steps:
+        value = output_dict[key]
+        if candidates is None:
+            candidates = dataset.predicate_row_ids(key, value)
+        elif len(candidates) < estimate:
+            candidates = dataset.probe_row_ids(key, value, candidates)
+        else:
+            candidates = intersect_row_ids([candidates, dataset.predicate_row_ids(key, value)])
+        if len(candidates) == 0:
+            break
+    return candidates
+
+
+def planned_row_ids(dataset, output_dict: dict):
+    """Same result as Dataset.filter_row_ids, doing only the work the query's own filters need."""
+    return run_plan(dataset, output_dict, plan(dataset, output_dict))
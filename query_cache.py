@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+## unit spellings collapsed to one form so "80 Lakhs" and "80 lac" share a cache entry
+UNIT_SPELLINGS = [
+    (r"(?<=\d)\s*(?:crores?|crs?\.?)(?![a-z])", " cr"),
+    (r"(?<=\d)\s*(?:lakhs?|lacs?|l)(?![a-z])", " lakh"),
+    (r"(?<=\d)\s*(?:sq\.?\s*ft\.?|sq\.?\s*feet|square\s*f(?:ee|oo)t|sqft)(?![a-z])", " sqft"),
+    (r"(?<=\d)\s*bhk(?![a-z])", " bhk"),
+    (r"(?:₹|\brs\.?|\binr\b)\s*", "₹"),
+]
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a user query used as the cache key:
+        "  2 BHK Pune under 1 Crore "  -> "2 bhk pune under 1 cr"
+        "2bhk pune under 1cr"          -> "2 bhk pune under 1 cr"
+    """
+    s = str(query or "").lower()
+    ## 1,50,00,000 -> 15000000; "2,3 bhk" is a list, not a grouped number, and keeps its comma
+    s = re.sub(r"(?<!\d)\d{1,3}(?:,\d{2,3})+(?![\d,])", lambda m: m.group(0).replace(",", ""), s)
+    for pattern, replacement in UNIT_SPELLINGS:
+        s = re.sub(pattern, replacement, s)
+    s = re.sub(r"[,;:!?\"']", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def prompt_version(template: str) -> str:
+    """Short fingerprint of a prompt template, so editing the prompt invalidates old entries."""
+    return hashlib.sha1(template.encode("utf-8")).hexdigest()[:12]
+
+
+class QueryCache:
+    """
+    Two-tier cache for main_agent extractions: an in-memory LRU in front of
+    an on-disk SQLite table, both expiring entries after `ttl_seconds`.
+    Keys are the normalized query plus the prompt-template version.
+    The SQLite file is created, opened and swept of expired entries on first
+    use (or by open()), not when the cache object is constructed at import.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, memory_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self.memory = OrderedDict()  # key -> (stored_at, value)
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.path = path
+        self.conn = None
+
+    def open(self):
+        with self.lock:
+            self.connection()
+        return self
+
+    def connection(self) -> sqlite3.Connection:
+        ## caller holds self.lock
+        if self.conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS query_cache "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+                )
+                conn.execute("DELETE FROM query_cache WHERE stored_at < ?", (time.time() - self.ttl_seconds,))
+            self.conn = conn
+        return self.conn
+
+    def key(self, query: str, version: str) -> str:
+        return hashlib.sha256(f"{version}\x00{normalize_query(query)}".encode("utf-8")).hexdigest()
+
+    def get(self, query: str, version: str) -> Optional[dict]:
+        key = self.key(query, version)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(entry[1])
+
+            row = self.connection().execute(
+                "SELECT value, stored_at FROM query_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] <= self.ttl_seconds:
+                self.remember(key, row[1], row[0])
+                self.disk_hits += 1
+                return json.loads(row[0])
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, version: str, value: dict):
+        key = self.key(query, version)
+        payload = json.dumps(value, sort_keys=True)
+        now = time.time()
+        with self.lock:
+            self.remember(key, now, payload)
+            conn = self.connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO query_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, payload, now),
+                )
+
+    def remember(self, key: str, stored_at: float, payload: str):
+        ## caller holds self.lock
+        self.memory[key] = (stored_at, payload)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+            }
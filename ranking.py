@@ -0,0 +1,103 @@
+import base64
+import hashlib
+import json
+
+import numpy as np
+
+from dataset import parse_date_range, parse_range
+from indexes import day_number
+from result_cache import canonical_query
+
+## a missing price / area / date ranks like a match this far off (relative distance)
+MISSING_PENALTY = 1.0
+
+
+def relative_distance(values: np.ndarray, target: float, scale: float) -> np.ndarray:
+    distance = np.abs(values - target) / scale
+    return np.where(np.isnan(distance), MISSING_PENALTY, distance)
+
+
+def closeness(dataset, output_dict: dict, row_ids: np.ndarray) -> np.ndarray:
+    """
+    Distance of every matched row from what the query asked for (lower is closer):
+        price          |price - budget| / budget          (budget: the max, else the min)
+        carpetArea     |area - requested| / requested     (requested: the min, else the max)
+        possessionDate |date - target| / 365 days         (target: the latest date, else the earliest)
+    Components add up; a query with none of these keys scores every row 0.
+    """
+    scores = np.zeros(len(row_ids))
+    for column, prefer in (("price", 1), ("carpetArea", 0)):
+        bounds = parse_range(column, output_dict[column]) if column in output_dict else None
+        target = None if bounds is None else (bounds[prefer] if bounds[prefer] is not None else bounds[1 - prefer])
+        if target:
+            scores += relative_distance(dataset.column_values(column, row_ids), target, abs(target))
+    bounds = parse_date_range(output_dict["possessionDate"]) if "possessionDate" in output_dict else None
+    if bounds is not None:
+        target = day_number(bounds[1] if bounds[1] is not None else bounds[0])
+        scores += relative_distance(dataset.column_values("possessionDate", row_ids), target, 365.0)
+    return scores
+
+
+def top_k(row_ids: np.ndarray, scores: np.ndarray, k: int, after=None) -> np.ndarray:
+    """
+    Positions of the k best rows by (score, row id), best first, optionally only
+    those ranked after the `after` (score, row id) pair. A partial selection
+    (np.partition) finds the k-th score in O(n); only the k picked rows are sorted.
+    """
+    positions = np.arange(len(row_ids))
+    if after is not None:
+        score, row_id = after
+        positions = np.flatnonzero((scores > score) | ((scores == score) & (row_ids > row_id)))
+    if len(positions) > k:
+        candidate_scores = scores[positions]
+        kth = np.partition(candidate_scores, k - 1)[k - 1]
+        better = positions[candidate_scores < kth]
+        ties = positions[candidate_scores == kth]
+        ties = ties[np.argsort(row_ids[ties], kind="stable")][: k - len(better)]
+        positions = np.concatenate([better, ties])
+    return positions[np.lexsort((row_ids[positions], scores[positions]))]
+
+
+def query_fingerprint(output_dict: dict) -> str:
+    return hashlib.sha256(canonical_query(output_dict).encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(version: int, output_dict: dict, shown: int, score: float, row_id: int) -> str:
+    payload = [version, query_fingerprint(output_dict), shown, float(score).hex(), int(row_id)]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, version: int, output_dict: dict):
+    """
+    (rows already shown, (score, row id) of the last one) for a cursor issued for
+    this query on this dataset version; None for anything else (malformed, another
+    query, or a version that has since been swapped out), which restarts at page one.
+    """
+    try:
+        cursor_version, fingerprint, shown, score, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if cursor_version != version or fingerprint != query_fingerprint(output_dict):
+            return None
+        return int(shown), (float.fromhex(score), int(row_id))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def rank_page(dataset, output_dict: dict, row_ids: np.ndarray, page_size: int, cursor=None):
+    """
+    One page of matches, closest first: (row ids, rows shown before this page,
+    cursor for the next page or None). Pages of the same query on the same
+    dataset version never overlap or skip rows, since the order is total.
+    """
+    shown, after = 0, None
+    if cursor:
+        resumed = decode_cursor(cursor, dataset.version, output_dict)
+        if resumed is not None:
+            shown, after = resumed
+    scores = closeness(dataset, output_dict, row_ids)
+    positions = top_k(row_ids, scores, page_size, after)
+    page = row_ids[positions]
+    next_cursor = None
+    if len(positions) and shown + len(positions) < len(row_ids):
+        last = positions[-1]
+        next_cursor = encode_cursor(dataset.version, output_dict, shown + len(positions), scores[last], row_ids[last])
+    return page, shown, next_cursor
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from dataset import CATEGORICAL_COLUMNS, FILTER_KEYS
+from indexes import address_tokens, normalize_category
+
+## bookkeeping per entry on top of the row-id bytes (key, tuple, dict slot)
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def canonical_query(output_dict: dict) -> str:
+    """
+    Canonical form of the filters in a PropertyQuery, so different phrasings
+    that extract to the same filters share one entry:
+        {"type": "2bhk ", "price": 9e6, "projectType": "RESIDENTIAL"}
+        {"price": 9000000, "type": "2BHK"}
+    both -> '{"price": 9000000.0, "type": "2BHK"}'
+    Keys that never narrow the rows are left out.
+    """
+    canonical = {}
+    for key in FILTER_KEYS:
+        if key not in (output_dict or {}):
+            continue
+        value = output_dict[key]
+        if key in CATEGORICAL_COLUMNS:
+            value = normalize_category(value)
+        elif key == "fullAddress":
+            value = sorted(set(address_tokens(value)))  # the location filter ANDs tokens in any order
+        elif key == "pincode" and value is not None:
+            value = str(value).split(".")[0].strip()
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+        elif isinstance(value, dict):
+            value = {k: float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else v
+                     for k, v in value.items()}
+        canonical[key] = value
+    return json.dumps(canonical, sort_keys=True, default=str)
+
+
+class FilterResultCache:
+    """
+    Filter-stage results (the matched row ids, never DataFrames) keyed by a
+    hash of the canonical PropertyQuery plus the dataset version. LRU-evicted
+    to stay under `max_entries` and `max_bytes`.
+
+    Call on_swap() whenever a new dataset version goes live: entries of
+    older versions are dropped and late results computed on them are not stored.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> row ids
+        self.bytes = 0
+        self.version = None  # live dataset version, once known
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, output_dict: dict, version: int) -> str:
+        return hashlib.sha256(f"{version}\x00{canonical_query(output_dict)}".encode("utf-8")).hexdigest()
+
+    def get(self, output_dict: dict, version: int) -> Optional[np.ndarray]:
+        key = self.key(output_dict, version)
+        with self.lock:
+            row_ids = self.entries.get(key)
+            if row_ids is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return row_ids
+
+    def put(self, output_dict: dict, version: int, row_ids: np.ndarray):
+        size = row_ids.nbytes + ENTRY_OVERHEAD_BYTES
+        key = self.key(output_dict, version)
+        with self.lock:
+            if self.version is not None and version != self.version:
+                return  # finished on a superseded version; nobody will ask for it again
+            if size > self.max_bytes:
+                return
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.nbytes + ENTRY_OVERHEAD_BYTES
+            self.entries[key] = row_ids
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.nbytes + ENTRY_OVERHEAD_BYTES
+
+    def on_swap(self, version: int):
+        """Registry callback: a new dataset version is live, so every cached result is stale."""
+        with self.lock:
+            self.version = version
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+            }
@@ -0,0 +1,96 @@
+import csv
+import io
+from functools import lru_cache
+
+import pandas as pd
+
+## columns that help answer a property question; ids and image URLs stay out of the prompt
+ANSWER_COLUMNS = [
+    "projectName", "type", "price", "carpetArea", "status", "possessionDate", "fullAddress",
+    "pincode", "landmark", "furnishedType", "listingType", "bathrooms", "balcony",
+    "projectType", "projectCategory",
+]
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str):
+    """tiktoken encoding for `model`, or None when it cannot be loaded (e.g. offline)."""
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4.1") -> int:
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1  # ~4 characters per token for English/CSV text
+    return len(encoding.encode(text))
+
+
+def format_value(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, pd.Timestamp):
+        return value.date().isoformat()
+    text = str(value)
+    return text[:-9] if text.endswith(" 00:00:00") else text  # "2025-09-28 00:00:00" -> "2025-09-28"
+
+
+def csv_line(values) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(values)
+    return buffer.getvalue()
+
+
+def summarize(rest: pd.DataFrame) -> str:
+    """One line describing the rows that did not fit in the budget."""
+    parts = []
+    if "price" in rest.columns and rest["price"].notna().any():
+        parts.append(f"price {format_value(rest['price'].min())}-{format_value(rest['price'].max())}")
+    if "carpetArea" in rest.columns and rest["carpetArea"].notna().any():
+        parts.append(f"carpetArea {format_value(rest['carpetArea'].min())}-{format_value(rest['carpetArea'].max())}")
+    for column in ("type", "projectName"):
+        if column in rest.columns:
+            values = rest[column].dropna().astype(str).value_counts()
+            if len(values):
+                parts.append(f"{column} " + "/".join(values.index[:5]) + ("/..." if len(values) > 5 else ""))
+    detail = f" ({'; '.join(parts)})" if parts else ""
+    return f"... and {len(rest)} more matching rows not listed{detail}"
+
+
+def serialize_rows(df, token_budget: int, top_k: int, columns=None, model: str = "gpt-4.1") -> str:
+    """
+    Compact prompt encoding of the matched rows: a CSV header followed by one
+    CSV line per row, restricted to answer-relevant columns. Rows are added
+    until `top_k` rows or `token_budget` tokens are reached; the remainder is
+    collapsed into a single summary line, so the prompt size stays bounded.
+    """
+    if df is None or len(df) == 0:
+        return "(no matching rows)"
+
+    columns = [c for c in (columns or ANSWER_COLUMNS) if c in df.columns]
+    projected = df[columns]
+    header = csv_line(columns)
+    lines = [header]
+    used = count_tokens(header, model)
+
+    included = 0
+    for row in projected.head(top_k).itertuples(index=False, name=None):
+        line = csv_line(format_value(v) for v in row)
+        cost = count_tokens(line, model) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+        included += 1
+
+    if included < len(projected):
+        lines.append(summarize(projected.iloc[included:]))
+    return "\n".join(lines)
@@ -0,0 +1,151 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from indexes import EMPTY_ROWS, address_tokens, freeze, intersect_row_ids
+
+SHARD_COLUMN = "cityId"
+UNKNOWN_SHARD = "__none__"  # rows without a cityId
+
+## per worker process: shard key -> (Dataset over the shard's rows, global row id of each shard row)
+worker_shards = {}
+
+
+def partition(df: pd.DataFrame, column: str = SHARD_COLUMN) -> dict:
+    """shard key -> sorted global row ids of the rows in that shard."""
+    if column not in df.columns:
+        return {UNKNOWN_SHARD: np.arange(len(df), dtype=np.int64)}
+    keys = df[column].astype(object).where(df[column].notna(), UNKNOWN_SHARD).astype(str).to_numpy()
+    codes, uniques = pd.factorize(keys)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {key: order[bounds[i]:bounds[i + 1]].astype(np.int64) for i, key in enumerate(uniques)}
+
+
+def assign_shards(shards: dict, workers: int) -> list:
+    """Shard keys per worker, largest shard first onto the least-loaded worker, so row counts stay balanced."""
+    loads = [[0, []] for _ in range(max(1, min(workers, len(shards))))]
+    for key in sorted(shards, key=lambda k: len(shards[k]), reverse=True):
+        load = min(loads, key=lambda l: l[0])
+        load[0] += len(shards[key])
+        load[1].append(key)
+    return [keys for _, keys in loads]
+
+
+def load_worker(frames: dict):
+    """Process initializer: index this worker's shards once, so queries only ship an output_dict."""
+    from dataset import Dataset
+    worker_shards.clear()
+    for key, (frame, global_ids) in frames.items():
+        worker_shards[key] = (Dataset(df=frame), global_ids)
+
+
+def filter_shard(key: str, output_dict: dict, location_tokens=None):
+    """
+    Global row ids in shard `key` that match `output_dict` (None if no filter applies).
+    `location_tokens` replaces output_dict["fullAddress"]: one list of accepted
+    spellings per address token, already resolved against the global vocabulary.
+    """
+    shard, global_ids = worker_shards[key]
+    row_id_sets = [shard.filter_row_ids(output_dict)]
+    if location_tokens is not None:
+        tokens = shard.location.tokens
+        row_id_sets.append(intersect_row_ids([
+            np.unique(np.concatenate([tokens.get(t, EMPTY_ROWS) for t in spellings])) if spellings else EMPTY_ROWS
+            for spellings in location_tokens
+        ]))
+    row_id_sets = [row_ids for row_ids in row_id_sets if row_ids is not None]
+    if not row_id_sets:
+        return None
+    return global_ids[intersect_row_ids(row_id_sets)]
+
+
+def filter_shards(keys: list, output_dict: dict, location_tokens=None) -> list:
+    return [filter_shard(key, output_dict, location_tokens) for key in keys]
+
+
+class ShardedFilter:
+    """
+    Runs the filter stage of one Dataset version on a process pool.
+
+    The table is split by cityId and each worker process holds and indexes
+    only the shards assigned to it. A query is sent only to the shards it can
+    touch (the parent's location index prunes cities when the query names a
+    place or pincode), the shards filter in parallel outside this process's
+    GIL, and the matching global row ids are merged back into one sorted array.
+    Misspelled address tokens are resolved in the parent against the whole
+    vocabulary, so every shard agrees with the other backends on what they mean.
+    """
+
+    def __init__(self, dataset, workers: int, column: str = SHARD_COLUMN):
+        self.dataset = dataset
+        self.shards = partition(dataset.df, column)
+        self.shard_of_row = np.empty(len(dataset.df), dtype=object)
+        for key, row_ids in self.shards.items():
+            self.shard_of_row[row_ids] = key
+        ## one single-process pool per worker, started with just its own shards
+        ## (spawn, not fork: the serving process runs threads - event loop, reload thread, HTTP pools)
+        self.pools = []
+        self.worker_of_shard = {}
+        for keys in assign_shards(self.shards, workers):
+            frames = {key: (dataset.df.take(self.shards[key]), self.shards[key]) for key in keys}
+            pool = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=load_worker,
+                initargs=(frames,),
+            )
+            for key in keys:
+                self.worker_of_shard[key] = len(self.pools)
+            self.pools.append(pool)
+
+    def resolve_location(self, location):
+        """Accepted spellings per address token of `location`, as LocationIndex.lookup reads it; None if no tokens."""
+        tokens = list(dict.fromkeys(address_tokens(location)))
+        if not tokens:
+            return None
+        vocabulary = self.dataset.location.tokens
+        return [
+            [token] if token in vocabulary
+            else [] if token.isdigit() or len(token) < 4
+            else self.dataset.location.similar(token)
+            for token in tokens
+        ]
+
+    def relevant_shards(self, output_dict: dict) -> list:
+        """Shards that can hold a match: the cities of the rows the location filters allow, else all of them."""
+        location_ids = [
+            ids for ids in (
+                self.dataset.location.lookup(output_dict["fullAddress"]) if "fullAddress" in output_dict else None,
+                self.dataset.location.pincode(output_dict["pincode"]) if "pincode" in output_dict else None,
+            ) if ids is not None
+        ]
+        if not location_ids:
+            return list(self.shards)
+        row_ids = np.concatenate(location_ids)
+        return sorted(set(self.shard_of_row[row_ids])) if len(row_ids) else []
+
+    def filter(self, output_dict: dict):
+        """Same result as Dataset.filter_row_ids, computed shard by shard on the workers."""
+        output_dict = dict(output_dict or {})
+        keys = self.relevant_shards(output_dict)
+        if not keys:
+            return EMPTY_ROWS  # the location matched no listing at all
+        location_tokens = None
+        if "fullAddress" in output_dict:
+            location_tokens = self.resolve_location(output_dict.pop("fullAddress"))
+        by_worker = {}
+        for key in keys:
+            by_worker.setdefault(self.worker_of_shard[key], []).append(key)
+        futures = [self.pools[worker].submit(filter_shards, shard_keys, output_dict, location_tokens)
+                   for worker, shard_keys in by_worker.items()]
+        results = [r for future in futures for r in future.result()]
+        if all(r is None for r in results):
+            return None  # every shard sees the same output_dict: nothing in it was a usable filter
+        return freeze(np.sort(np.concatenate([r for r in results if r is not None])))
+
+    def close(self):
+        for pool in self.pools:
+            pool.shutdown(wait=False, cancel_futures=True)
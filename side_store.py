@@ -0,0 +1,70 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from file_lock import replacing
+
+## shown to the user for result rows only; never filtered on, so they stay out of the in-memory table
+DISPLAY_COLUMNS = ["propertyImages", "floorPlanImage"]
+
+SQLITE_MAX_VARIABLES = 900
+
+
+def side_store_path(snapshot_path: str) -> str:
+    return f"{snapshot_path}.display.sqlite"
+
+
+class SideStore:
+    """
+    On-disk store for display-only columns (image URLs), keyed by snapshot row id.
+    Written next to the snapshot by the ETL; the serving process only fetches
+    the handful of rows that end up in an answer.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.columns = [row[1] for row in self.conn.execute("PRAGMA table_info(display)") if row[1] != "row_id"]
+            self.rows = self.conn.execute("SELECT value FROM meta WHERE key = 'rows'").fetchone()[0]
+
+    @staticmethod
+    def build(display_df: pd.DataFrame, path: str):
+        """Write `display_df` (one row per snapshot row, in snapshot order) to a fresh store at `path`."""
+        with replacing(path) as tmp_path:  # unique per build, so concurrent builders never share a file
+            SideStore.write(display_df, tmp_path)
+
+    @staticmethod
+    def write(display_df: pd.DataFrame, path: str):
+        conn = sqlite3.connect(path)
+        try:
+            with conn:
+                columns = ", ".join(f'"{c}" TEXT' for c in display_df.columns)
+                conn.execute(f"CREATE TABLE display (row_id INTEGER PRIMARY KEY, {columns})")
+                conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER)")
+                placeholders = ", ".join("?" for _ in range(len(display_df.columns) + 1))
+                records = (
+                    (row_id, *(None if pd.isna(v) else str(v) for v in values))
+                    for row_id, values in enumerate(display_df.itertuples(index=False, name=None))
+                )
+                conn.executemany(f"INSERT INTO display VALUES ({placeholders})", records)
+                conn.execute("INSERT INTO meta VALUES ('rows', ?)", (len(display_df),))
+        finally:
+            conn.close()
+
+    def fetch(self, row_ids: np.ndarray) -> pd.DataFrame:
+        """Display columns for `row_ids`, in the same order as `row_ids`."""
+        found = {}
+        ids = [int(i) for i in row_ids]
+        select = ", ".join(f'"{c}"' for c in self.columns)
+        with self.lock:
+            for start in range(0, len(ids), SQLITE_MAX_VARIABLES):
+                chunk = ids[start:start + SQLITE_MAX_VARIABLES]
+                marks = ", ".join("?" for _ in chunk)
+                for row in self.conn.execute(f"SELECT row_id, {select} FROM display WHERE row_id IN ({marks})", chunk):
+                    found[row[0]] = row[1:]
+        empty = (None,) * len(self.columns)
+        return pd.DataFrame([found.get(i, empty) for i in ids], columns=self.columns)
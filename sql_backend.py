@@ -0,0 +1,143 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dataset import CATEGORICAL_COLUMNS, DATE_COLUMNS, NUMERIC_COLUMNS, parse_date_range, parse_range
+from file_lock import replacing
+from indexes import EPOCH, address_tokens, day_number, freeze, normalize_category
+
+
+def filter_store_path(snapshot_path: str) -> str:
+    return f"{snapshot_path}.filters.sqlite"
+
+
+class SqlFilter:
+    """
+    The filter stage as one SQL statement over an embedded SQLite copy of the
+    filter columns (row_id = snapshot row position, categoricals normalized,
+    dates as days since the epoch, one address_tokens row per address token).
+
+    to_sql() turns a PropertyQuery into a single WHERE clause with the same
+    semantics as the per-column agents; SQLite's planner picks which of the
+    column indexes to drive the query from.
+    """
+
+    def __init__(self, path: str, location=None):
+        self.path = path
+        self.location = location  # LocationIndex, used only to resolve misspelled tokens to the vocabulary
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def build(df: pd.DataFrame, path: str):
+        """Write the filter columns of `df` (in snapshot row order) to a fresh store at `path`."""
+        table = pd.DataFrame({"row_id": np.arange(len(df), dtype=np.int64)})
+        for column in CATEGORICAL_COLUMNS:
+            if column in df.columns:
+                table[column] = df[column].map(normalize_category).astype(object)
+        for column in NUMERIC_COLUMNS:
+            if column in df.columns:
+                table[column] = pd.to_numeric(df[column], errors="coerce").astype(float)
+        for column in DATE_COLUMNS:
+            if column in df.columns:
+                parsed = pd.to_datetime(df[column], errors="coerce").dt.normalize()
+                table[column] = (parsed - pd.Timestamp(EPOCH)).dt.days.astype(object)
+        if "pincode" in df.columns:
+            table["pincode"] = df["pincode"].map(
+                lambda v: None if pd.isna(v) else str(v).strip().split(".")[0]).astype(object)
+        table = table.astype(object).where(table.notna(), None)
+
+        tokens = [
+            (row_id, token)
+            for column in ("fullAddress", "landmark") if column in df.columns
+            for row_id, value in enumerate(df[column].astype(object))
+            for token in set(address_tokens(value))
+        ]
+
+        with replacing(path) as tmp_path:  # unique per build, so concurrent builders never share a file
+            conn = sqlite3.connect(tmp_path)
+            try:
+                with conn:
+                    columns = ", ".join(f'"{c}"' for c in table.columns[1:])
+                    conn.execute(f"CREATE TABLE listings (row_id INTEGER PRIMARY KEY, {columns})")
+                    placeholders = ", ".join("?" for _ in table.columns)
+                    conn.executemany(f"INSERT INTO listings VALUES ({placeholders})", table.itertuples(index=False, name=None))
+                    for column in table.columns[1:]:
+                        conn.execute(f'CREATE INDEX "idx_{column}" ON listings ("{column}")')
+                    conn.execute("CREATE TABLE address_tokens (token TEXT, row_id INTEGER, PRIMARY KEY (token, row_id)) WITHOUT ROWID")
+                    conn.executemany("INSERT OR IGNORE INTO address_tokens VALUES (?, ?)", ((t, r) for r, t in tokens))
+                    conn.execute("ANALYZE")
+            finally:
+                conn.close()
+
+    def known_tokens(self, token: str) -> list:
+        """`token` itself if it is in the address vocabulary, else its closest spellings (as LocationIndex does)."""
+        if self.location is None or token in self.location.tokens:
+            return [token]
+        if token.isdigit() or len(token) < 4:
+            return []
+        return self.location.similar(token)
+
+    def to_sql(self, output_dict: dict):
+        """(WHERE clause, parameters) for `output_dict`, or None when no filter applies."""
+        clauses, params = [], []
+        for column in CATEGORICAL_COLUMNS:
+            if column in output_dict:
+                clauses.append(f'"{column}" = ?')
+                params.append(normalize_category(output_dict[column]))  # None never equals anything
+        for column in NUMERIC_COLUMNS:
+            bounds = parse_range(column, output_dict[column]) if column in output_dict else None
+            if bounds is None:
+                continue
+            low, high = bounds
+            if low is not None and high is not None and low > high:
+                clauses.append("0")
+                continue
+            if low is not None:
+                clauses.append(f'"{column}" >= ?')
+                params.append(low)
+            if high is not None:
+                clauses.append(f'"{column}" <= ?')
+                params.append(high)
+        for column in DATE_COLUMNS:
+            bounds = parse_date_range(output_dict[column]) if column in output_dict else None
+            if bounds is None:
+                continue
+            for operator, value in zip((">=", "<="), bounds):
+                if value is not None:
+                    clauses.append(f'"{column}" {operator} ?')
+                    params.append(day_number(value))
+        if "fullAddress" in output_dict:
+            tokens = list(dict.fromkeys(address_tokens(output_dict["fullAddress"])))
+            for token in tokens:
+                matches = self.known_tokens(token)
+                if not matches:
+                    clauses.append("0")
+                    continue
+                marks = ", ".join("?" for _ in matches)
+                clauses.append(f"row_id IN (SELECT row_id FROM address_tokens WHERE token IN ({marks}))")
+                params.extend(matches)
+        if "pincode" in output_dict:
+            value = output_dict["pincode"]
+            prefix = "" if value is None else "".join(ch for ch in str(value).split(".")[0] if ch.isdigit())
+            if prefix:
+                clauses.append("pincode >= ? AND pincode < ?")
+                params.extend([prefix, prefix + "\uffff"])
+        if not clauses:
+            return None
+        return " AND ".join(clauses), params
+
+    def filter(self, output_dict: dict):
+        """Same result as Dataset.filter_row_ids, computed by one SQL query."""
+        query = self.to_sql(output_dict or {})
+        if query is None:
+            return None
+        where, params = query
+        with self.lock:
+            rows = self.conn.execute(f"SELECT row_id FROM listings WHERE {where} ORDER BY row_id", params).fetchall()
+        return freeze(np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)))
+
+    def close(self):
+        self.conn.close()
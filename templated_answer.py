@@ -0,0 +1,165 @@
+import json
+import re
+
+import pandas as pd
+
+## queries asking for judgement or comparison always go to the LLM
+JUDGEMENT_WORDS = {
+    "which", "why", "how", "compare", "comparison", "best", "better", "recommend", "suggest",
+    "difference", "cheapest", "worth", "good", "should",
+}
+
+
+def format_price(value) -> str:
+    """12000000 -> '₹1.2 Cr', 4500000 -> '₹45 L', 9500 -> '₹9,500'."""
+    if value is None or pd.isna(value):
+        return "price on request"
+    value = float(value)
+    if value >= 1e7:
+        return f"₹{value / 1e7:.2f}".rstrip("0").rstrip(".") + " Cr"
+    if value >= 1e5:
+        return f"₹{value / 1e5:.2f}".rstrip("0").rstrip(".") + " L"
+    return f"₹{value:,.0f}"
+
+
+def format_number(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else f"{value:g}"
+
+
+def format_date(value) -> str:
+    parsed = pd.to_datetime(value, errors="coerce")
+    return "" if pd.isna(parsed) else parsed.strftime("%b %Y")
+
+
+def describe_range(spec, fmt, unit="") -> str:
+    if isinstance(spec, dict):
+        low, high = spec.get("min"), spec.get("max")
+        if low and high:
+            return f"between {fmt(low)} and {fmt(high)}{unit}"
+        if high:
+            return f"up to {fmt(high)}{unit}"
+        if low:
+            return f"from {fmt(low)}{unit}"
+        return ""
+    return f"{fmt(spec)}{unit}"
+
+
+def describe_filters(output_dict: dict) -> str:
+    """Readable summary of the extracted filters, e.g. '2BHK, up to ₹1.2 Cr, in Pune'."""
+    parts = []
+    if output_dict.get("type"):
+        parts.append(str(output_dict["type"]))
+    if output_dict.get("furnishedType"):
+        parts.append(str(output_dict["furnishedType"]).replace("_", " ").lower())
+    if output_dict.get("status"):
+        parts.append(str(output_dict["status"]).replace("_", " ").lower())
+    if output_dict.get("listingType"):
+        parts.append("for rent" if str(output_dict["listingType"]).lower() == "rent" else "for sale")
+    if output_dict.get("price") is not None:
+        parts.append(describe_range(output_dict["price"], format_price))
+    if output_dict.get("carpetArea") is not None:
+        area = output_dict["carpetArea"]
+        parts.append(describe_range(area if isinstance(area, dict) else {"min": area}, format_number, " sqft"))
+    for key, label in (("bathrooms", "bathroom(s)"), ("balcony", "balcony(ies)")):
+        if output_dict.get(key) is not None:
+            parts.append(f"{describe_range(output_dict[key], format_number)} {label}")
+    if output_dict.get("possessionDate"):
+        possession = output_dict["possessionDate"]
+        if isinstance(possession, dict):
+            parts.append("possession " + describe_range(possession, format_date))
+        else:
+            parts.append(f"possession before {format_date(possession)}")
+    if output_dict.get("fullAddress"):
+        parts.append(f"in {output_dict['fullAddress']}")
+    if output_dict.get("pincode"):
+        parts.append(f"pincode {output_dict['pincode']}")
+    return ", ".join(p for p in parts if p)
+
+
+def missing(value) -> bool:
+    ## None, NaN and pd.NA from the table's text columns all mean "not given"
+    return value is None or (not isinstance(value, str) and pd.isna(value))
+
+
+def text(value) -> str:
+    return "" if missing(value) else str(value).strip()
+
+
+def first_image(value) -> str:
+    if missing(value):
+        return ""
+    try:
+        images = json.loads(value)
+    except (TypeError, ValueError):
+        images = [value]
+    if isinstance(images, list):
+        return str(images[0]) if images else ""
+    return str(images)
+
+
+def describe_row(position: int, row: dict) -> str:
+    details = [text(row.get("type")), format_price(row.get("price"))]
+    if not missing(row.get("carpetArea")):
+        details.append(f"{format_number(row['carpetArea'])} sqft")
+    status = text(row.get("status")).replace("_", " ").lower()
+    possession = format_date(row.get("possessionDate"))
+    if status:
+        details.append(f"{status} (possession {possession})" if possession and "under" in status else status)
+    furnished = text(row.get("furnishedType")).replace("_", " ").lower()
+    if furnished:
+        details.append(furnished)
+    address = text(row.get("fullAddress"))
+    line = f"{position}. {text(row.get('projectName')) or 'Unnamed project'} - " + ", ".join(d for d in details if d)
+    if address:
+        line += f", {address}"
+    image = first_image(row.get("propertyImages")) or first_image(row.get("floorPlanImage"))
+    if image:
+        line += f"\n   Photo: {image}"
+    return line
+
+
+def needs_llm(user_query: str, output_dict: dict, final_df, mode: str, max_rows: int) -> bool:
+    """
+    Escalation policy for final_agent:
+      - mode "llm" always escalates, mode "template" never does;
+      - in "auto", a missing or empty result never needs the LLM, and small
+        result sets only need it when the user asks for a judgement
+        ("which is best", "compare", ...).
+    """
+    if mode == "llm":
+        return True
+    if mode == "template" or final_df is None or len(final_df) == 0:
+        return False
+    if len(final_df) > max_rows:
+        return True
+    words = set(re.findall(r"[a-z]+", str(user_query or "").lower()))
+    return bool(words & JUDGEMENT_WORDS)
+
+
+def render_answer(output_dict: dict, final_df, page: dict = None) -> str:
+    """
+    Deterministic, human-readable answer for the matched rows. With a `page`
+    from retrieve_agent the rows are one ranked page of `page["total"]` matches.
+    """
+    filters = describe_filters(output_dict or {})
+    if final_df is None:
+        return ("I couldn't pick out any search filters from your question. Tell me what you are looking "
+                "for - for example the BHK type, your budget, the area, or whether it should be ready to move.")
+    if len(final_df) == 0:
+        return (f"Sorry, I couldn't find any properties matching {filters or 'your search'}. "
+                "You could try widening the budget or dropping one of the filters.")
+
+    count = len(final_df)
+    total = page["total"] if page else count
+    start = page["start"] if page else 0
+    noun = "property" if total == 1 else "properties"
+    header = f"I found {total} {noun}" + (f" matching {filters}" if filters else "")
+    if total > count:
+        header += f"; here are {start + 1}-{start + count}, closest to what you asked for first"
+    lines = [header + ":"]
+    for position, row in enumerate(final_df.to_dict(orient="records"), start=start + 1):
+        lines.append(describe_row(position, row))
+    if page and page.get("next_cursor"):
+        lines.append(f"Ask for more to see the next {min(count, total - start - count)}.")
+    return "\n".join(lines)
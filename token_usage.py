@@ -0,0 +1,31 @@
+## the LLM-side half of tracing, kept apart so importing tracing does not pull in langchain
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tracing import current_usage
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Adds the token usage of every LLM call to the usage record of the node that made it."""
+
+    run_inline = True  # stay in the node's context so current_usage points at its record
+
+    def on_llm_end(self, response, **kwargs):
+        usage = current_usage.get()
+        if usage is None:
+            return
+        prompt, completion = 0, 0
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt += metadata.get("input_tokens", 0)
+                completion += metadata.get("output_tokens", 0)
+        if not (prompt or completion):
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt = token_usage.get("prompt_tokens", 0)
+            completion = token_usage.get("completion_tokens", 0)
+        usage["llm_calls"] += 1
+        usage["prompt_tokens"] += prompt
+        usage["completion_tokens"] += completion
+
+
+token_usage_handler = TokenUsageHandler()
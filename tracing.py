@@ -0,0 +1,201 @@
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("agent_graph.trace")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ROW_BUCKETS = (0, 1, 3, 10, 30, 100, 300, 1_000, 3_000, 10_000, 100_000, 1_000_000)
+BYTE_BUCKETS = tuple(1024 * 4 ** i for i in range(11))  # 1 KiB .. 1 GiB
+
+## token usage of the LLM calls made by the node that is currently running (per thread / task)
+current_usage = contextvars.ContextVar("current_usage", default=None)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label value."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self.series = {}  # label value -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float):
+        with self.lock:
+            series = self.series.setdefault(label_value, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_value, series in sorted(self.series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="{bound:g}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="+Inf"}} {series[len(self.buckets)]}')
+                lines.append(f'{self.name}_sum{{{self.label}="{label_value}"}} {series[-1]:g}')
+                lines.append(f'{self.name}_count{{{self.label}="{label_value}"}} {series[len(self.buckets)]}')
+        return lines
+
+
+class Counter:
+    """Prometheus-style counter keyed by (node, kind)."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, node: str, kind: str, amount: int):
+        with self.lock:
+            self.values[(node, kind)] = self.values.get((node, kind), 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for (node, kind), value in sorted(self.values.items()):
+                lines.append(f'{self.name}{{node="{node}",kind="{kind}"}} {value}')
+        return lines
+
+
+node_seconds = Histogram("agent_node_seconds", "Wall time per graph node.", "node", LATENCY_BUCKETS)
+node_rows_out = Histogram("agent_node_rows_out", "Rows a node left in df_dict (matched row ids / result rows).", "node", ROW_BUCKETS)
+node_bytes_out = Histogram("agent_node_bytes_out", "Bytes of row ids / DataFrames a node put in df_dict.", "node", BYTE_BUCKETS)
+request_seconds = Histogram("agent_request_seconds", "Wall time per workflow request.", "mode", LATENCY_BUCKETS)
+llm_tokens = Counter("agent_llm_tokens_total", "LLM tokens used per node.")
+METRICS = [node_seconds, node_rows_out, node_bytes_out, request_seconds, llm_tokens]
+
+
+def render_metrics() -> str:
+    """Everything recorded so far, in the Prometheus text exposition format."""
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+def size_of(value):
+    """(rows, bytes) of one df_dict entry."""
+    if isinstance(value, np.ndarray):
+        return len(value), value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return len(value), int(value.memory_usage(deep=True).sum())
+    return 0, 0
+
+
+def df_dict_size(df_dict) -> tuple:
+    rows, nbytes = 0, 0
+    for value in (df_dict or {}).values():
+        r, b = size_of(value)
+        rows, nbytes = rows + r, nbytes + b
+    return rows, nbytes
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def record(name: str, state: dict, update, started: float, usage: dict, rows_in: int, error=None):
+    seconds = time.perf_counter() - started
+    df_dict = update.get("df_dict") if isinstance(update, dict) else None
+    rows_out, bytes_out = df_dict_size(df_dict)
+    node_seconds.observe(name, seconds)
+    if df_dict:
+        node_rows_out.observe(name, rows_out)
+        node_bytes_out.observe(name, bytes_out)
+    if usage["llm_calls"]:
+        llm_tokens.inc(name, "prompt", usage["prompt_tokens"])
+        llm_tokens.inc(name, "completion", usage["completion_tokens"])
+    entry = {
+        "event": "node", "node": name, "trace_id": (state or {}).get("trace_id"),
+        "dataset_version": (state or {}).get("dataset_version"), "seconds": round(seconds, 6),
+        "rows_in": rows_in, "rows_out": rows_out, "bytes_out": bytes_out, **usage,
+    }
+    if error is not None:
+        entry["error"] = repr(error)
+    logger.info(json.dumps(entry))
+
+
+def rows_in_of(state: dict, table_rows) -> int:
+    ## a node reading row sets from df_dict starts from the largest one; otherwise it sees the whole table
+    sizes = [size_of(v)[0] for v in (state.get("df_dict") or {}).values()]
+    sizes = [s for s in sizes if s]
+    return max(sizes) if sizes else table_rows(state)
+
+
+def trace_node(name: str, fn, table_rows):
+    """
+    Wrap a graph node so every call records its wall time, rows in/out,
+    df_dict bytes and LLM token usage (JSON log line + histograms).
+    `table_rows(state)` gives the size of the table the request runs on.
+    """
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def traced_async(state):
+            token = current_usage.set({"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            rows_in, started, update = rows_in_of(state, table_rows), time.perf_counter(), None
+            try:
+                update = await fn(state)
+            except Exception as e:
+                record(name, state, update, started, current_usage.get(), rows_in, error=e)
+                raise
+            else:
+                record(name, state, update, started, current_usage.get(), rows_in)
+            finally:
+                current_usage.reset(token)
+            return update
+        return traced_async
+
+    @functools.wraps(fn)
+    def traced(state):
+        token = current_usage.set({"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        rows_in, started, update = rows_in_of(state, table_rows), time.perf_counter(), None
+        try:
+            update = fn(state)
+        except Exception as e:
+            record(name, state, update, started, current_usage.get(), rows_in, error=e)
+            raise
+        else:
+            record(name, state, update, started, current_usage.get(), rows_in)
+        finally:
+            current_usage.reset(token)
+        return update
+    return traced
+
+
+def configure_logging(path: str = None):
+    """
+    Send the JSON trace lines to `path` (appended) or stderr, one per line.
+    Python drops INFO records of a logger nobody configured, so the servers
+    call this at startup when TRACE_ENABLED is on; a logger that already has
+    handlers (configured by the host application) is left as it is.
+    """
+    if logger.handlers:
+        return logger
+    handler = logging.FileHandler(path) if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False  # the lines are already complete JSON; don't repeat them through the root logger
+    return logger
+
+
+def record_request(mode: str, trace_id: str, started: float, error=None):
+    seconds = time.perf_counter() - started
+    request_seconds.observe(mode, seconds)
+    entry = {"event": "request", "mode": mode, "trace_id": trace_id, "seconds": round(seconds, 6)}
+    if error is not None:
+        entry["error"] = repr(error)
+    logger.info(json.dumps(entry))
@@ -1,13 +1,21 @@
-from typing import TypedDict,List,Dict,Optional,Any
+from typing import TypedDict,List,Dict,Optional,Any,Union
+
+class NumericRange(TypedDict, total=False):
+    min: Optional[float]
+    max: Optional[float]
+
+class DateRange(TypedDict, total=False):
+    min: Optional[str]
+    max: Optional[str]
 
 class PropertyQuery(TypedDict, total=False):
     status: Optional[str]
-    possessionDate: Optional[str]
+    possessionDate: Optional[Union[str, DateRange]]
     fullAddress: Optional[str]
     pincode: Optional[str]
     type: Optional[str]
-    carpetArea: Optional[float]
-    price: Optional[float]
+    carpetArea: Optional[Union[float, NumericRange]]
+    price: Optional[Union[float, NumericRange]]
     bathrooms: Optional[int]
     balcony: Optional[int]
     listingType: Optional[str]
@@ -1,60 +1,308 @@
-from langgraph.graph import StateGraph, END,START
-from Agents import Agent
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from Agents import Agent, get_LLM, query_cache, registry
+from query_cache import normalize_query
+from tracing import new_trace_id, record_request, trace_node
+import config
 
 from State import State
+
+## PropertyQuery keys each per-column filter agent reads; a query without them skips the agent
+NODE_KEYS = {
+    "status_agent":["status"],
+    "furnished_agent":["furnishedType"],
+    "type_agent":["type"],
+    "listingType_agent":["listingType"],
+    "carpet_area_agent":["carpetArea"],
+    "price_agent":["price"],
+    "possession_date_agent":["possessionDate"],
+    "bathroom_agent":["bathrooms"],
+    "balcony_agent":["balcony"],
+    "location_agent":["fullAddress","pincode"],
+}
+
 class Workflow:
+    _graph = None ## compiled graph, built once per process and shared by every Workflow
+    _graph_lock = threading.Lock()
+
     def __init__(self):
         self.agent = Agent()
     
+    def filter_nodes(self):
+        """The filter-stage nodes for the configured FILTER_BACKEND; each one feeds retrieve_agent."""
+        if config.FILTER_BACKEND == "sharded":
+            ## one node filters every city shard in parallel on a process pool
+            return {"sharded_filter_agent":self.agent.sharded_filter_agent}
+        if config.FILTER_BACKEND == "sql":
+            ## one node pushes the whole query down to the embedded SQL store
+            return {"sql_filter_agent":self.agent.sql_filter_agent}
+        if config.FILTER_BACKEND == "planner":
+            ## one node runs the query's predicates in estimated-selectivity order
+            return {"planner_agent":self.agent.planner_agent}
+        return {
+            "status_agent":self.agent.status_agent,
+            "furnished_agent":self.agent.furnished_agent,
+            "type_agent":self.agent.type_agent,
+            "listingType_agent":self.agent.listingType_agent,
+            "carpet_area_agent":self.agent.carpet_area_agent,
+            "price_agent":self.agent.price_agent,
+            "possession_date_agent":self.agent.possession_date_agent,
+            "bathroom_agent":self.agent.bathroom_agent,
+            "balcony_agent":self.agent.balcony_agent,
+            "location_agent":self.agent.location_agent,
+        }
+
+    def traced(self,name,func,afunc = None):
+        ## with TRACE_ENABLED every node records wall time, rows in/out, df_dict bytes and LLM tokens
+        if config.TRACE_ENABLED:
+            table_rows = lambda state: len(registry.get(state.get("dataset_version")))
+            func = trace_node(name,func,table_rows)
+            afunc = afunc and trace_node(name,afunc,table_rows)
+        if not afunc:
+            return func
+        from langchain_core.runnables import RunnableLambda
+        return RunnableLambda(func,afunc=afunc)
+
     def create_workflow(self):
+        from langgraph.graph import StateGraph, END,START ## langgraph is slow to import; pay for it when the graph is built
         workflow = StateGraph(State)
+        filter_nodes = self.filter_nodes()
         ## defining all the nodes
-        workflow.add_node("main_agent",self.agent.main_agent)
-        workflow.add_node("status_agent",self.agent.status_agent)
-        workflow.add_node("furnished_agent",self.agent.furnished_agent)
-        workflow.add_node("type_agent",self.agent.type_agent)
-        workflow.add_node("listingType_agent",self.agent.listingType_agent)
-        workflow.add_node("carpet_area_agent",self.agent.carpet_area_agent)
-        workflow.add_node("price_agent",self.agent.price_agent)
-        workflow.add_node("possession_date_agent",self.agent.possession_date_agent)
-        workflow.add_node("bathroom_agent",self.agent.bathroom_agent)
-        workflow.add_node("balcony_agent",self.agent.balcony_agent)
-        workflow.add_node("retrieve_agent",self.agent.retrieve_agent)
-        workflow.add_node("final_agent",self.agent.final_agent)
+        ## the LLM nodes carry an async twin so graph.ainvoke never blocks a thread on the network
+        workflow.add_node("main_agent",self.traced("main_agent",self.agent.main_agent,self.agent.amain_agent))
+        for name,node in filter_nodes.items():
+            workflow.add_node(name,self.traced(name,node))
+        workflow.add_node("retrieve_agent",self.traced("retrieve_agent",self.agent.retrieve_agent))
+        workflow.add_node("final_agent",self.traced("final_agent",self.agent.final_agent,self.agent.afinal_agent))
 
         ## connecting the nodes with each other
         workflow.add_edge(START,"main_agent")
-        workflow.add_edge("main_agent","status_agent")
-        workflow.add_edge("main_agent","furnished_agent")
-        workflow.add_edge("main_agent","type_agent")
-        workflow.add_edge("main_agent","listingType_agent")
-        workflow.add_edge("main_agent","carpet_area_agent")
-        workflow.add_edge("main_agent","price_agent")
-        workflow.add_edge("main_agent","possession_date_agent")
-        workflow.add_edge("main_agent","bathroom_agent")
-        workflow.add_edge("main_agent","balcony_agent")
-
-        workflow.add_edge("status_agent","retrieve_agent")
-        workflow.add_edge("furnished_agent","retrieve_agent")
-        workflow.add_edge("type_agent","retrieve_agent")
-        workflow.add_edge("listingType_agent","retrieve_agent")
-        workflow.add_edge("carpet_area_agent","retrieve_agent")
-        workflow.add_edge("price_agent","retrieve_agent")
-        workflow.add_edge("possession_date_agent","retrieve_agent")
-        workflow.add_edge("bathroom_agent","retrieve_agent")
-        workflow.add_edge("balcony_agent","retrieve_agent")
+        ## fan out to the filter nodes the query needs, unless main_agent found the filter set in the result cache
+        def route_filters(state):
+            if state.get("df_dict",{}).get("row_ids_cached") is not None:
+                return ["retrieve_agent"]
+            output_dict = state.get("output_dict") or {}
+            needed = [name for name in filter_nodes
+                      if name not in NODE_KEYS or any(key in output_dict for key in NODE_KEYS[name])]
+            return needed or ["retrieve_agent"]
+        workflow.add_conditional_edges("main_agent",route_filters,list(filter_nodes) + ["retrieve_agent"])
+        for name in filter_nodes:
+            workflow.add_edge(name,"retrieve_agent")
         workflow.add_edge("retrieve_agent","final_agent")
         workflow.add_edge("final_agent",END)
 
         graph = workflow.compile()
         return graph
     
-    def execute(self,inputs):
-        graph = self.create_workflow()
+    def get_graph(self):
+        if Workflow._graph is None:
+            with Workflow._graph_lock:
+                if Workflow._graph is None:
+                    Workflow._graph = self.create_workflow()
+        return Workflow._graph
 
+    async def aget_graph(self):
+        ## compiling imports langgraph; a request arriving before warmup does that on a worker thread
+        if Workflow._graph is None:
+            await asyncio.to_thread(self.get_graph)
+        return Workflow._graph
+
+    def warmup(self):
+        """
+        Compile the graph, load the dataset indexes, build the LLM clients and
+        open the extraction cache up front, so the first request only pays for
+        its own work. Importing the
+        modules does none of this; without warmup() it happens on first use.
+        """
+        self.get_graph()
+        get_LLM.build()
+        import token_usage ## langchain callbacks for run_config
+        query_cache.open() ## extraction cache on disk: created and swept of expired entries
+        from serializer import get_encoding
+        get_encoding("gpt-4.1") ## final_agent's token budget; tiktoken may have to download it
+        dataset = registry.current()
+        if config.FILTER_BACKEND == "sharded":
+            ## start the shard workers now, and for every reloaded version before it takes traffic
+            dataset.sharded_filter()
+            registry.on_swap(lambda version: registry.get(version).sharded_filter())
+        elif config.FILTER_BACKEND == "sql":
+            dataset.sql_filter()
+            registry.on_swap(lambda version: registry.get(version).sql_filter())
+        return self
+
+    @contextmanager
+    def pinned(self,inputs,mode = "execute"):
+        """
+        Run a request on the dataset version that is live when it starts, even across
+        a hot swap, under a fresh trace id (its total wall time is recorded as `mode`).
+        """
+        version = registry.acquire()
+        trace_id = inputs.get("trace_id") or new_trace_id()
+        started = time.perf_counter()
+        error = None
         try:
-            response = graph.invoke(inputs)
-            return response["response"].content
+            yield {**inputs,"dataset_version":version,"trace_id":trace_id}
         except Exception as e:
-            raise e 
+            error = e
+            raise
+        finally:
+            registry.release(version)
+            if config.TRACE_ENABLED:
+                record_request(mode,trace_id,started,error)
+
+    @asynccontextmanager
+    async def apinned(self,inputs,mode):
+        """
+        pinned() for the async paths: the first dataset load (or waiting for a
+        background warmup to finish it) happens on a worker thread, so the event
+        loop keeps serving other requests meanwhile.
+        """
+        if registry.latest == 0:
+            await asyncio.to_thread(registry.current)
+        with self.pinned(inputs,mode) as pinned_inputs:
+            yield pinned_inputs
+
+    def run_config(self):
+        ## LLM calls inside the nodes report their token usage to the tracer
+        if not config.TRACE_ENABLED:
+            return {}
+        from token_usage import token_usage_handler
+        return {"callbacks":[token_usage_handler]}
+
+    def execute(self,inputs):
+        return self.execute_page(inputs)["response"]
+
+    async def aexecute(self,inputs):
+        return (await self.aexecute_page(inputs))["response"]
+
+    def execute_page(self,inputs):
+        """
+        Like execute(), plus the paging of the ranked matches:
+            {"response": answer, "total": matches or None, "next_cursor": str or None}
+        Passing next_cursor back as inputs["cursor"] with the same query answers with the next page.
+        """
+        graph = self.get_graph()
+        with self.pinned(inputs) as pinned_inputs:
+            response = graph.invoke(pinned_inputs,config = self.run_config())
+        return self.page_result(response)
+
+    async def aexecute_page(self,inputs):
+        """Async version of execute_page()."""
+        graph = await self.aget_graph()
+        async with self.apinned(inputs,"aexecute") as pinned_inputs:
+            response = await graph.ainvoke(pinned_inputs,config = self.run_config())
+        return self.page_result(response)
+
+    def page_result(self,response):
+        page = response.get("page") or {}
+        return {"response":response["response"].content,"total":page.get("total"),"next_cursor":page.get("next_cursor")}
+
+    def execute_batch(self,queries,max_concurrency = None):
+        """
+        Answers for many saved searches at once, in input order, without going
+        through the graph query by query:
+          1. identical queries (after normalization) are answered once;
+          2. extractions not served by the fast path / cache go out as one batched LLM call;
+          3. all filter sets are resolved together, sharing identical filters and predicates;
+          4. answers that need the LLM go out as one batched call.
+        Every query runs on the same pinned dataset version. A query whose LLM
+        call failed gets the exception instead of an answer string.
+        """
+        max_concurrency = max_concurrency or config.BATCH_MAX_CONCURRENCY
+        unique = {}
+        for query in queries:
+            unique.setdefault(normalize_query(query),query)
+        user_queries = list(unique.values())
+        with self.pinned({},"execute_batch") as pinned_inputs:
+            version = pinned_inputs["dataset_version"]
+            output_dicts = self.agent.extract_batch(user_queries,max_concurrency,version)
+            states = self.batch_states(user_queries,output_dicts,version)
+            responses = self.agent.final_batch([s for s in states if s is not None],max_concurrency)
+        return self.batch_answers(queries,unique,output_dicts,states,responses)
+
+    async def aexecute_batch(self,queries,max_concurrency = None):
+        """Async version of execute_batch()."""
+        max_concurrency = max_concurrency or config.BATCH_MAX_CONCURRENCY
+        unique = {}
+        for query in queries:
+            unique.setdefault(normalize_query(query),query)
+        user_queries = list(unique.values())
+        async with self.apinned({},"aexecute_batch") as pinned_inputs:
+            version = pinned_inputs["dataset_version"]
+            output_dicts = await self.agent.aextract_batch(user_queries,max_concurrency,version)
+            states = self.batch_states(user_queries,output_dicts,version)
+            responses = await self.agent.afinal_batch([s for s in states if s is not None],max_concurrency)
+        return self.batch_answers(queries,unique,output_dicts,states,responses)
+
+    def batch_states(self,user_queries,output_dicts,version):
+        ## the state final_agent would see for each query; None where the extraction failed
+        dataset = registry.get(version)
+        extracted = [d for d in output_dicts if not isinstance(d,Exception)]
+        row_ids = iter(self.agent.filter_batch(extracted,version))
+        states = []
+        for user_query,output_dict in zip(user_queries,output_dicts):
+            if isinstance(output_dict,Exception):
+                states.append(None)
+                continue
+            ids = next(row_ids)
+            state = {"user_query":user_query,"output_dict":output_dict,"dataset_version":version,
+                     "df_dict":{"final_filtered_df":None}}
+            if ids is not None:
+                state.update(self.agent.ranked(state,dataset,ids)) ## first page of the ranked matches
+            states.append(state)
+        return states
+
+    def batch_answers(self,queries,unique,output_dicts,states,responses):
+        responses = iter(responses)
+        answers = {}
+        for key,output_dict,state in zip(unique,output_dicts,states):
+            response = output_dict if state is None else next(responses)
+            answers[key] = response if isinstance(response,Exception) else response.content
+        return [answers[normalize_query(query)] for query in queries]
+
+    def stream(self,inputs):
+        """
+        Yields the answer piece by piece while final_agent is still generating it,
+        using LangGraph's "messages" stream mode. If the answer did not come from
+        a streaming LLM call, it is yielded once at the end.
+        """
+        graph = self.get_graph()
+        streamed = False
+        final_state = None
+        with self.pinned(inputs,"stream") as pinned_inputs:
+            for mode, chunk in graph.stream(pinned_inputs,stream_mode = ["messages","values"],config = self.run_config()):
+                if mode == "messages":
+                    token = self.answer_token(chunk)
+                    if token:
+                        streamed = True
+                        yield token
+                else:
+                    final_state = chunk
+        if not streamed and final_state is not None:
+            yield final_state["response"].content
+
+    async def astream(self,inputs):
+        """Async version of stream(), used by the SSE endpoint."""
+        graph = await self.aget_graph()
+        streamed = False
+        final_state = None
+        async with self.apinned(inputs,"astream") as pinned_inputs:
+            async for mode, chunk in graph.astream(pinned_inputs,stream_mode = ["messages","values"],config = self.run_config()):
+                if mode == "messages":
+                    token = self.answer_token(chunk)
+                    if token:
+                        streamed = True
+                        yield token
+                else:
+                    final_state = chunk
+        if not streamed and final_state is not None:
+            yield final_state["response"].content
 
+    def answer_token(self,chunk):
+        ## only final_agent tokens belong to the answer; main_agent's structured output is internal
+        message, metadata = chunk
+        if metadata.get("langgraph_node") != "final_agent":
+            return None
+        return message.content